@@ -1,13 +1,635 @@
+import argparse
+import asyncio
 import heapq
+import json
+import math
+import multiprocessing
+import os
+import random
+import socket
+import tempfile
+import time
+import zlib
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 
 # Data Structures
 
-priority_queue = []   # emergency patients -> (priority, patient_name)
-regular_queue = deque()  # normal patients -> patient_name
-
 SERVICE_TIME = 15  # minutes per patient
+SEVERITY_LEVELS = 5  # 1 = critical ... 5 = less severe
+
+
+class FenwickTree:
+    """Binary indexed tree of counts: O(log n) point update and prefix sum.
+
+    Grows by doubling so callers can keep using ever-increasing indexes.
+    """
+
+    def __init__(self, size: int = 16):
+        self.tree = [0] * (1 << max(size - 1, 1).bit_length()) + [0]
+
+    def _grow(self, index: int):
+        # The size stays a power of two; after doubling, only the new last node covers old entries.
+        while len(self.tree) - 1 <= index:
+            size = len(self.tree) - 1
+            total = self.prefix(size)
+            self.tree.extend([0] * size)
+            self.tree[-1] = total
+
+    def add(self, index: int, delta: int):
+        if index >= len(self.tree) - 1:
+            self._grow(index)
+        i = index + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, count: int) -> int:
+        """Sum of the values at indexes [0, count)."""
+        total = 0
+        i = min(count, len(self.tree) - 1)
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+COMPACT_MIN_DEAD = 64  # compact a bucket once it holds this many cancelled entries and more dead than live
+SEQ_SLACK = 64         # sequence numbers a bucket may use beyond twice its waiting patients before renumbering
+
+
+class Patient:
+    """Handle for a queued patient, returned by PatientQueue.add."""
+
+    __slots__ = ("pid", "name", "severity", "seq", "waiting")
+
+    def __init__(self, pid: int, name: str, severity: int | None, seq: int):
+        self.pid = pid
+        self.name = name
+        self.severity = severity  # None for a regular patient
+        self.seq = seq            # arrival sequence in the current bucket
+        self.waiting = True
+
+    def __repr__(self):
+        return f"Patient({self.pid}, {self.name!r}, severity={self.severity})"
+
+
+class PatientQueue:
+    """Bucket queue for emergencies plus a regular FIFO, with an order-statistic index.
+
+    Severity is bounded, so emergencies live in one deque per level and a
+    bitmask records which levels have waiting patients; patients of equal
+    severity are seen in arrival order. The regular queue is one more
+    bucket after the emergency levels.
+
+    Every patient gets an arrival sequence number within its bucket, and
+    their place in the bucket is that number minus the patients who left
+    ahead of them. Pops leave from the front, so they are only counted;
+    cancellations and re-triages leave from the middle and are recorded
+    by sequence in one Fenwick tree per bucket. add and pop are therefore
+    amortised O(1), while cancel, set_severity and position are O(log n).
+    `by_id` and `by_name` map to Patient handles in O(1).
+
+    A patient who leaves from the middle only makes their bucket entry
+    stale (lazy deletion); stale entries are skipped on pop. A bucket is
+    compacted, dropping its stale entries and numbering its patients from
+    0 again, once they outnumber its live entries or its sequence numbers
+    outrun twice its waiting patients, so each tree stays proportional to
+    the patients waiting in that bucket.
+    """
+
+    REGULAR = SEVERITY_LEVELS  # bucket index of the regular queue
+
+    def __init__(self):
+        self.buckets = [deque() for _ in range(SEVERITY_LEVELS + 1)]  # bucket -> (seq, Patient)
+        self.by_id: dict[int, Patient] = {}
+        self.by_name: dict[str, list[Patient]] = {}
+        self._live = [0] * (SEVERITY_LEVELS + 1)
+        self._dead = [0] * (SEVERITY_LEVELS + 1)
+        self._mask = 0  # bit s-1 set while level s has waiting patients
+        self._next_seq = [0] * (SEVERITY_LEVELS + 1)
+        self._pid = 0
+        self._popped = [0] * (SEVERITY_LEVELS + 1)                        # patients popped since compaction
+        self._gone = [FenwickTree() for _ in range(SEVERITY_LEVELS + 1)]  # others who left, by sequence
+        self.wal: WriteAheadLog | None = None  # when set, every change is logged before it is acknowledged
+        self.feed: EtaFeed | None = None        # when set, position changes are pushed to its listeners
+
+    def __len__(self):
+        return len(self.by_id)
+
+    @staticmethod
+    def _bucket(severity: int | None) -> int:
+        if severity is None:
+            return PatientQueue.REGULAR
+        if not 1 <= severity <= SEVERITY_LEVELS:
+            raise ValueError(f"severity must be 1..{SEVERITY_LEVELS}")
+        return severity - 1
+
+    def _enqueue(self, patient: Patient, bucket: int):
+        if self._next_seq[bucket] >= 2 * self._live[bucket] + SEQ_SLACK:
+            self._compact(bucket)
+        patient.seq = self._next_seq[bucket]
+        self._next_seq[bucket] += 1
+        self.buckets[bucket].append((patient.seq, patient))
+        self._live[bucket] += 1
+        if bucket < self.REGULAR:
+            self._mask |= 1 << bucket
+
+    def _unlink(self, patient: Patient, bucket: int, front: bool = False):
+        """Take a waiting patient out of the counts of its bucket; the deque entry goes stale."""
+        if front:
+            self._popped[bucket] += 1
+        else:
+            self._gone[bucket].add(patient.seq, 1)
+        self._live[bucket] -= 1
+        if bucket < self.REGULAR and not self._live[bucket]:
+            self._mask &= ~(1 << bucket)
+
+    def _bury(self, bucket: int):
+        self._dead[bucket] += 1
+        if self._dead[bucket] >= COMPACT_MIN_DEAD and self._dead[bucket] > self._live[bucket]:
+            self._compact(bucket)
+
+    def _compact(self, bucket: int):
+        """Drop the bucket's stale entries and renumber its patients 0, 1, ... in order; O(n)."""
+        waiting = [entry[1] for entry in self.buckets[bucket] if self._is_live(entry, bucket)]
+        for seq, patient in enumerate(waiting):
+            patient.seq = seq
+        self.buckets[bucket] = deque(enumerate(waiting))
+        self._popped[bucket] = 0
+        self._gone[bucket] = FenwickTree()
+        self._next_seq[bucket] = len(waiting)
+        self._dead[bucket] = 0
+
+    def _is_live(self, entry, bucket: int) -> bool:
+        seq, patient = entry
+        return patient.waiting and patient.seq == seq and self._bucket(patient.severity) == bucket
+
+    def _forget(self, patient: Patient):
+        patient.waiting = False
+        del self.by_id[patient.pid]
+        same_name = self.by_name[patient.name]
+        same_name.remove(patient)
+        if not same_name:
+            del self.by_name[patient.name]
+
+    def add(self, name: str, severity: int | None = None) -> Patient:
+        """Queue a patient; severity None means a regular patient."""
+        bucket = self._bucket(severity)
+        patient = Patient(self._pid, name, severity, 0)
+        self._pid += 1
+        self._enqueue(patient, bucket)
+        self.by_id[patient.pid] = patient
+        self.by_name.setdefault(name, []).append(patient)
+        if self.wal is not None:
+            self.wal.log("add", name, severity)
+        if self.feed is not None:
+            self.feed.joined(patient, self.position(patient), len(self))
+        return patient
+
+    def pop(self) -> Patient | None:
+        """Remove and return the next patient, or None."""
+        if self._mask:
+            bucket = (self._mask & -self._mask).bit_length() - 1  # most severe level with patients
+        elif self._live[self.REGULAR]:
+            bucket = self.REGULAR
+        else:
+            return None
+        entries = self.buckets[bucket]
+        while True:
+            entry = entries.popleft()
+            if self._is_live(entry, bucket):
+                break
+            self._dead[bucket] -= 1
+        patient = entry[1]
+        self._unlink(patient, bucket, front=True)
+        self._forget(patient)
+        if self.wal is not None:
+            self.wal.log("call", patient.pid)
+        if self.feed is not None:
+            self.feed.left(patient, 0, len(self))
+        return patient
+
+    def cancel(self, patient: Patient) -> bool:
+        """Remove a waiting patient (left, transferred...) in O(log n)."""
+        if not patient.waiting:
+            return False
+        bucket = self._bucket(patient.severity)
+        position = self.position(patient) if self.feed is not None else 0
+        self._unlink(patient, bucket)
+        self._forget(patient)
+        self._bury(bucket)
+        if self.wal is not None:
+            self.wal.log("cancel", patient.pid)
+        if self.feed is not None:
+            self.feed.left(patient, position, len(self))
+        return True
+
+    def set_severity(self, patient: Patient, severity: int | None) -> bool:
+        """Re-triage a waiting patient, e.g. move a regular patient to the emergency levels.
+
+        The patient joins the back of the new level, as FIFO order within a
+        level is by arrival at that level.
+        """
+        if not patient.waiting:
+            return False
+        new_bucket = self._bucket(severity)
+        old_bucket = self._bucket(patient.severity)
+        if new_bucket == old_bucket:
+            return True
+        position = self.position(patient) if self.feed is not None else 0
+        self._unlink(patient, old_bucket)
+        patient.severity = severity
+        self._enqueue(patient, new_bucket)
+        self._bury(old_bucket)
+        if self.wal is not None:
+            self.wal.log("severity", patient.pid, severity)
+        if self.feed is not None:
+            self.feed.left(patient, position, len(self) - 1)
+            self.feed.joined(patient, self.position(patient), len(self))
+        return True
+
+    def find(self, name: str) -> Patient | None:
+        """The waiting patient with this name who will be seen first."""
+        patients = self.by_name.get(name)
+        if not patients:
+            return None
+        return min(patients, key=self.position)
+
+    def position(self, patient: Patient) -> int:
+        """Number of patients who will be seen before this one."""
+        bucket = self._bucket(patient.severity)
+        ahead = sum(self._live[:bucket])
+        return ahead + patient.seq - self._popped[bucket] - self._gone[bucket].prefix(patient.seq)
+
+    def wait_time(self, name: str) -> int | None:
+        patient = self.find(name)
+        return None if patient is None else self.position(patient) * SERVICE_TIME
+
+    def emergency(self) -> list[Patient]:
+        """Waiting emergency patients in treatment order."""
+        return [p for level in range(SEVERITY_LEVELS) for p in self.waiting_in(level)]
+
+    def regular(self) -> list[Patient]:
+        return list(self.waiting_in(self.REGULAR))
+
+    def waiting_in(self, bucket: int):
+        return (entry[1] for entry in self.buckets[bucket] if self._is_live(entry, bucket))
+
+    def commit(self):
+        """Make every change so far durable and publish it; call before acknowledging them."""
+        if self.wal is not None:
+            self.wal.commit()
+            if self.wal.snapshot_due():
+                self.wal.snapshot(self)
+        if self.feed is not None:
+            self.feed.flush()
+
+    def to_snapshot(self) -> dict:
+        patients = [[p.pid, p.name, p.severity] for bucket in range(self.REGULAR + 1) for p in self.waiting_in(bucket)]
+        return {"next_pid": self._pid, "patients": patients}
+
+    @classmethod
+    def from_snapshot(cls, state: dict) -> "PatientQueue":
+        q = cls()
+        for pid, name, severity in state["patients"]:  # treatment order, so sequence numbers keep it
+            patient = Patient(pid, name, severity, 0)
+            q._enqueue(patient, q._bucket(severity))
+            q.by_id[pid] = patient
+            q.by_name.setdefault(name, []).append(patient)
+        q._pid = state["next_pid"]
+        return q
+
+
+# ETA Updates
+
+class EtaFeed:
+    """Pushes wait-time changes to waiting-room displays as they happen.
+
+    Every queue change is a join or a leave at a queue position, and the
+    only ETAs it changes are those of the patients behind that position,
+    which all move by one SERVICE_TIME. So instead of recomputing every
+    wait, each change becomes a record plus one range shift, found with the
+    queue's O(log n) position index:
+
+        ("join", pid, position, eta)     patient inserted at position
+        ("leave", pid, position)         patient at position removed
+        ("shift", start, stop, minutes)  ETAs at positions [start, stop) changed
+
+    Records are applied in order; positions are those after the record.
+    They are buffered and sent to every listener as one list per
+    `flush`, which PatientQueue.commit calls after each acknowledged batch.
+    A new subscriber first receives joins for everyone already waiting.
+    """
+
+    def __init__(self, queue: PatientQueue):
+        self.queue = queue
+        self.listeners = []
+        self.pending: list[tuple] = []
+        queue.feed = self
+
+    def subscribe(self, listener):
+        """Call `listener(records)` with each batch of changes."""
+        self.flush()  # pending records are already part of the state sent below
+        waiting = self.queue.emergency() + self.queue.regular()
+        listener([("join", p.pid, i, i * SERVICE_TIME) for i, p in enumerate(waiting)])
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def joined(self, patient: Patient, position: int, size: int):
+        self.pending.append(("join", patient.pid, position, position * SERVICE_TIME))
+        if position + 1 < size:
+            self.pending.append(("shift", position + 1, size, SERVICE_TIME))
+
+    def left(self, patient: Patient, position: int, size: int):
+        self.pending.append(("leave", patient.pid, position))
+        if position < size:
+            self.pending.append(("shift", position, size, -SERVICE_TIME))
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        for listener in self.listeners:
+            listener(batch)
+
+
+class EtaBoard:
+    """Listener keeping a display's copy of the queue order and each patient's ETA."""
+
+    def __init__(self):
+        self.order: list[int] = []
+        self.eta: dict[int, int] = {}
+
+    def __call__(self, records: list[tuple]):
+        for record in records:
+            if record[0] == "join":
+                _, pid, position, eta = record
+                self.order.insert(position, pid)
+                self.eta[pid] = eta
+            elif record[0] == "leave":
+                del self.eta[self.order.pop(record[2])]
+            else:
+                _, start, stop, minutes = record
+                for pid in self.order[start:stop]:
+                    self.eta[pid] += minutes
+
+
+# Persistence
+
+WAL_FILE = "patient_queue.wal"
+SNAPSHOT_FILE = "patient_queue.snapshot.json"
+SNAPSHOT_EVERY = 100_000  # log records between snapshots
+
+
+def read_log(path: str) -> list:
+    """Parse a line-delimited JSON log, truncating it after the last complete record.
+
+    A record is complete once its newline is written. A last line that
+    parses but lacks one is torn too: it was never acknowledged, and the
+    next append would land on the same line and make it unreadable.
+    """
+    records = []
+    good = 0
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break  # partial last write, never acknowledged
+                good += len(line)
+            size = f.seek(0, os.SEEK_END)
+    except FileNotFoundError:
+        return records
+    if good < size:
+        with open(path, "r+b") as f:
+            f.truncate(good)
+    return records
+
+
+class WriteAheadLog:
+    """Line-delimited log of queue changes plus periodic snapshots.
+
+    Changes are buffered by `log` and written with one fsync by `commit`
+    (group commit): callers acknowledge a batch of operations only after
+    committing it. Records are numbered (LSN) and a snapshot stores the
+    last LSN it covers, so after a snapshot the log is truncated and
+    recovery replays only the records written since. A crash between
+    writing the snapshot and truncating the log is harmless, as records
+    the snapshot already covers are skipped.
+    """
+
+    def __init__(self, path: str = WAL_FILE, snapshot_path: str = SNAPSHOT_FILE,
+                 snapshot_every: int | None = SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every
+        self.lsn = 0             # number of the last record logged
+        self.since_snapshot = 0  # records in the log file, committed or not
+        self.pending: list[str] = []
+        self._file = None
+
+    def log(self, op: str, *args):
+        self.lsn += 1
+        self.since_snapshot += 1
+        self.pending.append(json.dumps([self.lsn, op, *args]) + "\n")
+
+    def commit(self):
+        if not self.pending:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a")
+        self._file.write("".join(self.pending))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.pending.clear()
+
+    def snapshot_due(self) -> bool:
+        return self.snapshot_every is not None and self.since_snapshot >= self.snapshot_every
+
+    def snapshot(self, queue: PatientQueue):
+        """Write the queue state atomically, then start a fresh log."""
+        self.commit()
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"lsn": self.lsn, **queue.to_snapshot()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        self.close()
+        open(self.path, "w").close()
+        self.since_snapshot = 0
+
+    def recover(self) -> PatientQueue:
+        """Rebuild the queue from the snapshot and the log after it, and attach this log to it."""
+        try:
+            with open(self.snapshot_path) as f:
+                state = json.load(f)
+            queue = PatientQueue.from_snapshot(state)
+            self.lsn = state["lsn"]
+        except FileNotFoundError:
+            queue = PatientQueue()
+            self.lsn = 0
+        records = read_log(self.path)
+        self.since_snapshot = len(records)
+        for lsn, op, *args in records:
+            if lsn > self.lsn:
+                self._redo(queue, op, args)
+                self.lsn = lsn
+        queue.wal = self
+        return queue
+
+    @staticmethod
+    def _redo(queue: PatientQueue, op: str, args: list):
+        if op == "add":
+            queue.add(*args)
+        elif op == "call":
+            patient = queue.pop()
+            if patient is None or patient.pid != args[0]:
+                raise ValueError(f"log does not match the queue: expected to call patient {args[0]}")
+        elif op == "cancel":
+            queue.cancel(queue.by_id[args[0]])
+        elif op == "severity":
+            queue.set_severity(queue.by_id[args[0]], args[1])
+        else:
+            raise ValueError(f"unknown log record {op!r}")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# Forecasting
+
+ARRIVALS_PER_HOUR = {1: 0.1, 2: 0.3, 3: 0.6, 4: 1.0, 5: 1.5, None: 3.0}  # new patients expected per severity
+FORECAST_DOCTORS = 2  # 8 patients an hour at SERVICE_TIME, against 6.5 expected arrivals
+FORECAST_SIMULATIONS = 2_000
+FORECAST_HORIZON = 12 * 60  # minutes simulated; later waits are reported as infinite
+
+
+class Exponential:
+    def __init__(self, mean: float):
+        self.mean = mean
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.expovariate(1 / self.mean)
+
+
+class LogNormal:
+    """Right-skewed service time with the given mean; sigma is the spread of its logarithm."""
+
+    def __init__(self, mean: float, sigma: float = 0.5):
+        self.mu = math.log(mean) - sigma * sigma / 2
+        self.sigma = sigma
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.lognormvariate(self.mu, self.sigma)
+
+
+class Fixed:
+    def __init__(self, minutes: float):
+        self.minutes = minutes
+
+    def sample(self, rng: random.Random) -> float:
+        return self.minutes
+
+
+class ForecastModel:
+    """Arrival rates, service times and staffing for wait-time simulations.
+
+    `arrivals_per_hour` maps a severity (None for regular) to a Poisson
+    arrival rate; `service` is one distribution for everyone or a mapping
+    from severity to distribution. Each simulation stops at `horizon`
+    minutes: if patients arrive faster than the doctors can see them, a
+    less severe patient may never be called, so an infinite horizon is only
+    safe for a model whose doctors keep up.
+    """
+
+    def __init__(self, arrivals_per_hour: dict | None = None, service=None, doctors: int = FORECAST_DOCTORS,
+                 horizon: float = FORECAST_HORIZON):
+        arrivals_per_hour = ARRIVALS_PER_HOUR if arrivals_per_hour is None else arrivals_per_hour
+        service = Exponential(SERVICE_TIME) if service is None else service
+        levels = [*range(1, SEVERITY_LEVELS + 1), None]
+        self.rates = [arrivals_per_hour.get(severity, 0) / 60 for severity in levels]  # per minute, by bucket
+        self.service = [service[severity] if isinstance(service, dict) else service for severity in levels]
+        self.doctors = doctors
+        self.horizon = horizon
+
+
+def simulate_waits(model: ForecastModel, buckets: list[int], sims: int, seed: int) -> list[list[float]]:
+    """Run `sims` simulations of a queue whose waiting patients are in these buckets, in treatment order.
+
+    Returns, per waiting patient, the minutes until a doctor starts seeing
+    them in each simulation, or infinity if that is past the model's horizon.
+    Doctors are non-preemptive and start part-way through a consultation;
+    new arrivals go ahead of every waiting patient in a less severe bucket,
+    as they do in PatientQueue.
+    """
+    rng = random.Random(seed)
+    rates, service, n = model.rates, model.service, len(buckets)
+    levels = range(len(rates))
+    waits = [[math.inf] * sims for _ in range(n)]
+    for sim in range(sims):
+        free = sorted(rng.random() * service[PatientQueue.REGULAR].sample(rng) for _ in range(model.doctors))
+        arrival = [rng.expovariate(rate) if rate else math.inf for rate in rates]
+        arrived = [0] * len(rates)
+        pos = 0
+        while pos < n:
+            t = heapq.heappop(free)
+            if t > model.horizon:
+                break
+            for b in levels:
+                while arrival[b] <= t:
+                    arrived[b] += 1
+                    arrival[b] += rng.expovariate(rates[b])
+            first = buckets[pos]
+            for b in range(first):
+                if arrived[b]:
+                    arrived[b] -= 1
+                    break
+            else:
+                b = first
+                waits[pos][sim] = t
+                pos += 1
+            heapq.heappush(free, t + service[b].sample(rng))
+    return waits
+
+
+def forecast_waits(queue: PatientQueue, model: ForecastModel | None = None, sims: int = FORECAST_SIMULATIONS,
+                   workers: int = 1, seed: int | None = None) -> dict[int, tuple[float, float]]:
+    """p50 and p90 wait in minutes for every waiting patient, keyed by patient ID.
+
+    A wait past the model's horizon is infinite. With workers > 1 the simulations are split across processes.
+    """
+    model = model or ForecastModel()
+    patients = [(p, bucket) for bucket in range(PatientQueue.REGULAR + 1) for p in queue.waiting_in(bucket)]
+    buckets = [bucket for _, bucket in patients]
+    seed = random.randrange(1 << 32) if seed is None else seed
+    if workers <= 1:
+        waits = simulate_waits(model, buckets, sims, seed)
+    else:
+        share = -(-sims // workers)
+        jobs = [(model, buckets, min(share, sims - start), seed + start) for start in range(0, sims, share)]
+        waits = [[] for _ in patients]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(simulate_waits, *zip(*jobs)):
+                for mine, theirs in zip(waits, part):
+                    mine.extend(theirs)
+    forecast = {}
+    for (patient, _), samples in zip(patients, waits):
+        samples.sort()
+        forecast[patient.pid] = (percentile(samples, 50), percentile(samples, 90))
+    return forecast
+
+
+queue = PatientQueue()
 
 
 # Core Functions
@@ -17,55 +639,52 @@ def add_patient():
     patient_type = input("Is it emergency? (y/n): ").lower()
 
     if patient_type == 'y':
-        severity = int(input("Enter severity (1=critical, 5=less severe): "))
-        heapq.heappush(priority_queue, (severity, name))
-        print(f"Emergency patient {name} added with severity {severity}.")
+        try:
+            severity = int(input("Enter severity (1=critical, 5=less severe): "))
+            patient = queue.add(name, severity)
+        except ValueError:
+            print(f"Severity must be a whole number from 1 to {SEVERITY_LEVELS}.")
+            return
+        queue.commit()
+        print(f"Emergency patient {name} added with severity {severity} (ID {patient.pid}).")
     else:
-        regular_queue.append(name)
-        print(f"Regular patient {name} added to queue.")
+        patient = queue.add(name)
+        queue.commit()
+        print(f"Regular patient {name} added to queue (ID {patient.pid}).")
 
 
 def view_queues():
     print("\n--- Emergency Patients ---")
-    if priority_queue:
-        for s, n in sorted(priority_queue):
-            print(f"{n} (Severity {s})")
+    emergency = queue.emergency()
+    if emergency:
+        for p in emergency:
+            print(f"{p.name} (Severity {p.severity})")
     else:
         print("No emergency patients.")
 
     print("\n--- Regular Patients ---")
-    if regular_queue:
-        for n in regular_queue:
-            print(n)
+    regular = queue.regular()
+    if regular:
+        for p in regular:
+            print(p.name)
     else:
         print("No regular patients.")
 
 
 def next_patient():
-    if priority_queue:
-        severity, name = heapq.heappop(priority_queue)
-        print(f"Next patient (Emergency): {name} (Severity {severity})")
-    elif regular_queue:
-        name = regular_queue.popleft()
-        print(f"Next patient (Regular): {name}")
-    else:
+    patient = queue.pop()
+    if patient is None:
         print("No patients in queue.")
+        return
+    queue.commit()
+    if patient.severity is not None:
+        print(f"Next patient (Emergency): {patient.name} (Severity {patient.severity})")
+    else:
+        print(f"Next patient (Regular): {patient.name}")
 
 
 def estimated_wait_time(name):
-    # Check emergency patients first
-    emergency_list = sorted(priority_queue)
-    for i, (s, n) in enumerate(emergency_list):
-        if n == name:
-            return i * SERVICE_TIME
-
-    # Then check regular patients
-    for i, n in enumerate(regular_queue):
-        if n == name:
-            wait_before = len(priority_queue) * SERVICE_TIME  # all emergencies first
-            return wait_before + i * SERVICE_TIME
-
-    return None
+    return queue.wait_time(name)
 
 
 def check_wait_time():
@@ -77,6 +696,586 @@ def check_wait_time():
         print("Patient not found in queue.")
 
 
+def forecast_wait_times():
+    if not len(queue):
+        print("No patients in queue.")
+        return
+    forecast = forecast_waits(queue)
+    print(f"\n--- Forecast waits ({FORECAST_SIMULATIONS} simulations, {FORECAST_DOCTORS} doctor(s)) ---")
+    for p in queue.emergency() + queue.regular():
+        p50, p90 = (f"{w:.0f} min" if w <= FORECAST_HORIZON else f"> {FORECAST_HORIZON // 60} h"
+                    for w in forecast[p.pid])
+        print(f"{p.name}: {p50} typical, {p90} at worst (9 in 10)")
+
+
+def lookup_patient() -> Patient | None:
+    key = input("Enter patient name or ID: ")
+    patient = queue.by_id.get(int(key)) if key.isdigit() else queue.find(key)
+    if patient is None:
+        print("Patient not found in queue.")
+    return patient
+
+
+def cancel_patient():
+    patient = lookup_patient()
+    if patient and queue.cancel(patient):
+        queue.commit()
+        print(f"{patient.name} removed from the queue.")
+
+
+def retriage_patient():
+    patient = lookup_patient()
+    if patient is None:
+        return
+    answer = input("New severity (1-5, or blank for regular queue): ")
+    try:
+        queue.set_severity(patient, int(answer) if answer else None)
+    except ValueError:
+        print(f"Severity must be a whole number from 1 to {SEVERITY_LEVELS}.")
+        return
+    queue.commit()
+    print(f"{patient.name} re-triaged; new wait {queue.position(patient) * SERVICE_TIME} minutes.")
+
+
+# Async Service
+
+SERVICE_MAX_PENDING = 1024  # queued requests before callers are made to wait (back-pressure)
+SERVICE_BATCH = 256         # requests applied per worker wake-up
+
+
+class QueueService:
+    """Asyncio front end letting many intake desks and doctors share one queue.
+
+    Callers never touch the PatientQueue directly: each operation is a
+    request on a bounded asyncio.Queue, so producers slow down instead of
+    piling up when the worker falls behind. A single worker task drains the
+    requests in batches and applies them in order, which keeps the queue
+    consistent without locks. Doctors may wait for the next patient; they
+    are parked and served in arrival order as patients are added. If the
+    queue has a write-ahead log, each batch is committed once before any of
+    its requests are answered.
+    """
+
+    def __init__(self, queue: PatientQueue | None = None,
+                 max_pending: int = SERVICE_MAX_PENDING, batch_size: int = SERVICE_BATCH):
+        self.queue = queue if queue is not None else PatientQueue()
+        self.batch_size = batch_size
+        self._requests: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._doctors: deque = deque()  # futures of doctors waiting for a patient
+        self._worker: asyncio.Task | None = None
+
+    async def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        await self._requests.join()
+        self._worker.cancel()
+        for doctor in self._doctors:
+            if not doctor.done():  # a doctor may have stopped waiting
+                doctor.set_result(None)
+        self._doctors.clear()
+
+    async def _submit(self, op: str, *args):
+        future = asyncio.get_running_loop().create_future()
+        await self._requests.put((op, args, future))
+        return await future
+
+    # --- public operations ---
+    async def add(self, name: str, severity: int | None = None) -> Patient:
+        return await self._submit("add", name, severity)
+
+    async def add_many(self, patients) -> list[Patient]:
+        """Add (name, severity) pairs as one request."""
+        return await self._submit("add_many", list(patients))
+
+    async def next_patient(self, wait: bool = False) -> Patient | None:
+        """Call the next patient; with wait=True, wait until there is one."""
+        return await self._submit("next", wait)
+
+    async def call_many(self, n: int) -> list[Patient]:
+        """Call up to n patients as one request."""
+        return await self._submit("call_many", n)
+
+    async def wait_time(self, name: str) -> int | None:
+        return await self._submit("wait_time", name)
+
+    async def cancel(self, pid: int) -> bool:
+        return await self._submit("cancel", pid)
+
+    # --- worker ---
+    async def _run(self):
+        while True:
+            batch = [await self._requests.get()]
+            while len(batch) < self.batch_size and not self._requests.empty():
+                batch.append(self._requests.get_nowait())
+            results = []
+            for op, args, future in batch:
+                if future.done():
+                    # The caller gave up (cancelled or timed out); applying the
+                    # request now would, say, pop a patient nobody is told about.
+                    results.append(None)
+                    continue
+                try:
+                    result = self._apply(op, args)
+                except Exception as e:  # a bad request fails alone; the worker keeps serving
+                    result = e
+                if result is _PARKED:
+                    self._doctors.append(future)
+                results.append(result)
+            calls = self._call_waiting_doctors()
+            self.queue.commit()  # group commit: one fsync acknowledges the whole batch
+            for (_, _, future), result in zip(batch, results):
+                if result is not _PARKED and not future.done():
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+                self._requests.task_done()
+            for doctor, patient in calls:
+                doctor.set_result(patient)
+
+    def _apply(self, op: str, args: tuple):
+        q = self.queue
+        if op == "add":
+            return q.add(*args)
+        if op == "add_many":
+            for _, severity in args[0]:
+                q._bucket(severity)  # validate every pair first: the request is all or nothing
+            return [q.add(name, severity) for name, severity in args[0]]
+        if op == "next":
+            patient = q.pop()
+            if patient is None and args[0]:
+                return _PARKED
+            return patient
+        if op == "call_many":
+            called = []
+            while len(called) < args[0] and (patient := q.pop()) is not None:
+                called.append(patient)
+            return called
+        if op == "wait_time":
+            return q.wait_time(args[0])
+        if op == "cancel":
+            patient = q.by_id.get(args[0])
+            return patient is not None and q.cancel(patient)
+        raise ValueError(f"unknown operation {op!r}")
+
+    def _call_waiting_doctors(self) -> list:
+        calls = []
+        while self._doctors and len(self.queue):
+            doctor = self._doctors.popleft()
+            if not doctor.done():
+                calls.append((doctor, self.queue.pop()))
+        return calls
+
+
+class _Parked:
+    """Marker result: the request's future is completed later by a patient arrival."""
+
+
+_PARKED = _Parked()
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+async def load_test(desks: int = 8, doctors: int = 4, patients: int = 50_000, batch: int = 1,
+                    seed: int = 1) -> dict:
+    """Drive a QueueService with concurrent desks and doctors; returns throughput and latencies."""
+    service = QueueService()
+    await service.start()
+    rng = random.Random(seed)
+    add_latency: list[float] = []
+    call_latency: list[float] = []
+    per_desk = patients // desks
+    total = per_desk * desks
+    served = 0
+
+    async def desk(d: int):
+        for start in range(0, per_desk, batch):
+            group = [(f"desk{d}-{i}", rng.choice([None, 1, 2, 3, 4, 5]))
+                     for i in range(start, min(start + batch, per_desk))]
+            t0 = time.perf_counter()
+            if batch == 1:
+                await service.add(*group[0])
+            else:
+                await service.add_many(group)
+            add_latency.append(time.perf_counter() - t0)
+
+    async def doctor():
+        nonlocal served
+        while served < total:
+            t0 = time.perf_counter()
+            if batch == 1:
+                called = [await service.next_patient(wait=True)]
+            else:
+                called = await service.call_many(batch) or [await service.next_patient(wait=True)]
+            call_latency.append(time.perf_counter() - t0)
+            served += sum(p is not None for p in called)
+
+    started = time.perf_counter()
+    doctor_tasks = [asyncio.create_task(doctor()) for _ in range(doctors)]
+    await asyncio.gather(*(desk(d) for d in range(desks)))
+    while served < total:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    await service.stop()
+    await asyncio.gather(*doctor_tasks)
+    add_latency.sort()
+    call_latency.sort()
+    return {
+        "patients": total, "seconds": elapsed, "ops_per_sec": 2 * total / elapsed,
+        "add_p50_ms": percentile(add_latency, 50) * 1000, "add_p99_ms": percentile(add_latency, 99) * 1000,
+        "call_p50_ms": percentile(call_latency, 50) * 1000, "call_p99_ms": percentile(call_latency, 99) * 1000,
+    }
+
+
+# Sharded Server
+
+SHARD_PORT = 7400  # shard i listens on SHARD_PORT + i (or on <unix path>.<i>)
+SHARD_WRITE_BUFFER = 1 << 16  # bytes of replies buffered before waiting for the client to read
+SHARD_OPS = ("add", "next", "wait", "cancel")
+
+
+def shard_of(department: str, shards: int) -> int:
+    """Shard that owns a department; stable across processes and runs."""
+    return zlib.crc32(department.encode()) % shards
+
+
+def shard_address(index: int, port: int = SHARD_PORT, unix: str | None = None):
+    return f"{unix}.{index}" if unix else ("127.0.0.1", port + index)
+
+
+def apply_command(queues: dict[str, PatientQueue], command: list):
+    """Run one [op, department, *args] command against a shard's queues.
+
+    A department's queue is created by the first patient added to it, so
+    a failed or read-only command never leaves an empty one behind.
+    """
+    if not isinstance(command, list) or len(command) < 2:
+        raise ValueError("a command is a list: [op, department, *args]")
+    op, department, *args = command
+    if op not in SHARD_OPS:
+        raise ValueError(f"unknown operation {op!r}")
+    q = queues.get(department)
+    if q is None:
+        q = PatientQueue()
+    if op == "add":
+        pid = q.add(*args).pid
+        queues[department] = q
+        return pid
+    if op == "next":
+        patient = q.pop()
+        return None if patient is None else [patient.pid, patient.name, patient.severity]
+    if op == "wait":
+        return q.wait_time(args[0])
+    if op == "cancel":
+        patient = q.by_id.get(args[0])
+        return patient is not None and q.cancel(patient)
+
+
+async def serve_shard(address, ready=None):
+    """Serve the departments of one shard until cancelled.
+
+    The protocol is line-delimited JSON: each request line is a list of
+    [op, department, *args] commands and is answered by one line with the
+    list of their results, in order. Clients may pipeline, sending many
+    lines before reading any replies. A command that fails returns
+    {"error": message} in its slot and the rest of the batch still runs.
+    The shard's queues are touched only by this process's event loop,
+    so no locking is needed.
+    """
+    queues: dict[str, PatientQueue] = {}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        while line := await reader.readline():
+            try:
+                commands = json.loads(line)
+            except ValueError:
+                results = {"error": "request is not valid JSON"}
+            else:
+                if isinstance(commands, list):
+                    results = []
+                    for command in commands:
+                        try:
+                            results.append(apply_command(queues, command))
+                        except (ValueError, TypeError, KeyError, IndexError) as e:
+                            results.append({"error": str(e)})
+                else:
+                    results = {"error": "request is not a list of commands"}
+            writer.write(json.dumps(results).encode() + b"\n")
+            if writer.transport.get_write_buffer_size() > SHARD_WRITE_BUFFER:
+                await writer.drain()
+        writer.close()
+
+    if isinstance(address, str):
+        server = await asyncio.start_unix_server(handle, address)
+    else:
+        server = await asyncio.start_server(handle, *address)
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+def _run_shard(address, ready):
+    try:
+        asyncio.run(serve_shard(address, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+def start_shards(shards: int, port: int = SHARD_PORT, unix: str | None = None) -> list:
+    """Start one worker process per shard and wait until all are listening."""
+    processes = []
+    for index in range(shards):
+        address = shard_address(index, port, unix)
+        if unix and os.path.exists(address):
+            os.remove(address)
+        ready = multiprocessing.Event()
+        process = multiprocessing.Process(target=_run_shard, args=(address, ready), daemon=True)
+        process.start()
+        processes.append((process, ready))
+    for process, ready in processes:
+        if not ready.wait(10):
+            raise RuntimeError(f"shard process {process.pid} did not start")
+    return [process for process, _ in processes]
+
+
+class ShardClient:
+    """Blocking client that routes commands to the shard owning each department."""
+
+    def __init__(self, shards: int, port: int = SHARD_PORT, unix: str | None = None):
+        self.shards = shards
+        self._files = []
+        for index in range(shards):
+            address = shard_address(index, port, unix)
+            sock = socket.socket(socket.AF_UNIX if unix else socket.AF_INET, socket.SOCK_STREAM)
+            sock.connect(address)
+            if not unix:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._files.append(sock.makefile("rwb"))
+
+    def execute(self, batches: list[list[list]]) -> list[list]:
+        """Send every batch of commands before reading any reply; returns results per batch."""
+        routes = []
+        for commands in batches:
+            per_shard: dict[int, list[int]] = {}
+            for i, command in enumerate(commands):
+                per_shard.setdefault(shard_of(command[1], self.shards), []).append(i)
+            for shard, indexes in per_shard.items():
+                self._files[shard].write(json.dumps([commands[i] for i in indexes]).encode() + b"\n")
+            routes.append(per_shard)
+        for f in self._files:
+            f.flush()
+        results = []
+        for commands, per_shard in zip(batches, routes):
+            out = [None] * len(commands)
+            for shard, indexes in per_shard.items():
+                for i, result in zip(indexes, json.loads(self._files[shard].readline())):
+                    out[i] = result
+            results.append(out)
+        return results
+
+    def add(self, department: str, name: str, severity: int | None = None) -> int:
+        return self.execute([[["add", department, name, severity]]])[0][0]
+
+    def next_patient(self, department: str):
+        return self.execute([[["next", department]]])[0][0]
+
+    def wait_time(self, department: str, name: str) -> int | None:
+        return self.execute([[["wait", department, name]]])[0][0]
+
+    def cancel(self, department: str, pid: int) -> bool:
+        return self.execute([[["cancel", department, pid]]])[0][0]
+
+    def close(self):
+        for f in self._files:
+            f.close()
+
+
+# Benchmark
+
+
+def benchmark(n: int = 200_000, lookups: int = 1_000, seed: int = 1):
+    """Time n pushes then n pops, and wait-time lookups: the old (severity, name) heap vs PatientQueue."""
+    rng = random.Random(seed)
+    patients = [(f"patient{i}", rng.randint(1, SEVERITY_LEVELS)) for i in range(n)]
+    names = [name for name, _ in rng.sample(patients, min(lookups, n))]
+
+    heap = []
+    start = time.perf_counter()
+    for name, severity in patients:
+        heapq.heappush(heap, (severity, name))
+    heap_push = time.perf_counter() - start
+    start = time.perf_counter()
+    for name in names[:20]:  # the old lookup sorted the heap and scanned it, per call
+        next(i for i, (_, other) in enumerate(sorted(heap)) if other == name)
+    heap_lookup = (time.perf_counter() - start) / len(names[:20])
+    start = time.perf_counter()
+    while heap:
+        heapq.heappop(heap)
+    heap_pop = time.perf_counter() - start
+
+    q = PatientQueue()
+    start = time.perf_counter()
+    for name, severity in patients:
+        q.add(name, severity)
+    queue_push = time.perf_counter() - start
+    start = time.perf_counter()
+    for name in names:
+        q.wait_time(name)
+    queue_lookup = (time.perf_counter() - start) / len(names)
+    start = time.perf_counter()
+    while q.pop():
+        pass
+    queue_pop = time.perf_counter() - start
+
+    print(f"{n:,} patients (PatientQueue also keeps handles, the name index and the wait-time index):")
+    print(f"  push: heapq {n / heap_push:,.0f}/s, PatientQueue {n / queue_push:,.0f}/s")
+    print(f"  pop:  heapq {n / heap_pop:,.0f}/s, PatientQueue {n / queue_pop:,.0f}/s")
+    print(f"  wait-time lookup: heapq {heap_lookup * 1e3:.1f} ms (sort and scan), "
+          f"PatientQueue {queue_lookup * 1e6:.1f} us")
+
+
+def wal_benchmark(events: int = 2_000_000, group: int = 256, seed: int = 1):
+    """Log a random queue history of `events` changes, then time recovery from disk."""
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = os.path.join(tmp, "queue.wal"), os.path.join(tmp, "queue.snapshot.json")
+
+        def run(n: int, group: int) -> float:
+            q = WriteAheadLog(*paths).recover()
+            start = time.perf_counter()
+            for i in range(n):
+                r = rng.random()
+                if r < 0.5 or not len(q):
+                    q.add(f"patient{i}", rng.choice([None, 1, 2, 3, 4, 5]))
+                elif r < 0.85:
+                    q.pop()
+                elif r < 0.95:
+                    q.cancel(q.by_id[next(iter(q.by_id))])
+                else:
+                    q.set_severity(q.by_id[next(iter(q.by_id))], rng.randint(1, SEVERITY_LEVELS))
+                if (i + 1) % group == 0:
+                    q.commit()
+            q.commit()
+            elapsed = time.perf_counter() - start
+            q.wal.close()
+            return elapsed
+
+        single = min(events, 2_000)
+        single_time = run(single, 1)
+        grouped_time = run(events, group)
+        wal_size = os.path.getsize(paths[0])
+        snapshot_size = os.path.getsize(paths[1]) if os.path.exists(paths[1]) else 0
+
+        start = time.perf_counter()
+        wal = WriteAheadLog(*paths)
+        recovered = wal.recover()
+        recover_time = time.perf_counter() - start
+        wal.close()
+
+    print(f"{events + single:,} logged events, {len(recovered):,} patients waiting at the end:")
+    print(f"  fsync per event:      {single / single_time:,.0f} events/s ({single:,} events)")
+    print(f"  group commit of {group}: {events / grouped_time:,.0f} events/s")
+    print(f"  recovery: {recover_time:.3f}s (snapshot {snapshot_size / 1e6:.1f} MB + "
+          f"{wal.since_snapshot:,} log records, {wal_size / 1e6:.1f} MB)")
+
+
+def forecast_benchmark(waiting: int = 200, sims: int = FORECAST_SIMULATIONS, workers: int = 1, seed: int = 1):
+    """Time one forecast for a queue of `waiting` patients."""
+    rng = random.Random(seed)
+    q = PatientQueue()
+    for i in range(waiting):
+        q.add(f"patient{i}", rng.choice([None, None, 1, 2, 3, 4, 5]))
+    start = time.perf_counter()
+    forecast = forecast_waits(q, ForecastModel(doctors=4, horizon=math.inf), sims, workers, seed)
+    elapsed = time.perf_counter() - start
+    last = q.regular()[-1] if q.regular() else q.emergency()[-1]
+    print(f"{sims} simulations of {waiting} waiting patients on {workers} worker(s): {elapsed:.3f}s")
+    print(f"  last patient: p50 {forecast[last.pid][0]:.0f} min, p90 {forecast[last.pid][1]:.0f} min "
+          f"(fixed estimate {q.position(last) * SERVICE_TIME} min)")
+
+
+def eta_benchmark(waiting: int = 10_000, changes: int = 200, seed: int = 1):
+    """Cost of keeping every ETA current: pushed range shifts vs recomputing all waits per change."""
+
+    def run(push: bool) -> float:
+        rng = random.Random(seed)
+        q = PatientQueue()
+        for i in range(waiting):
+            q.add(f"patient{i}", rng.choice([None, None, 1, 2, 3, 4, 5]))
+        records = []
+        if push:
+            EtaFeed(q).subscribe(records.extend)
+        start = time.perf_counter()
+        for i in range(changes):
+            if rng.random() < 0.5:
+                q.add(f"new{i}", rng.choice([None, None, 1, 2, 3, 4, 5]))
+            else:
+                q.pop()
+            if push:
+                q.commit()
+            else:
+                records = [(p.pid, q.position(p) * SERVICE_TIME) for p in q.by_id.values()]
+        return time.perf_counter() - start
+
+    pushed = run(True)
+    recomputed = run(False)
+    print(f"{changes} changes to a queue of {waiting} patients:")
+    print(f"  pushed deltas: {pushed:.3f}s ({changes / pushed:,.0f} changes/s)")
+    print(f"  recompute all: {recomputed:.3f}s ({changes / recomputed:,.0f} changes/s)")
+
+
+def _shard_bench_client(args) -> int:
+    shards, port, unix, commands, batch, depth, seed = args
+    rng = random.Random(seed)
+    client = ShardClient(shards, port, unix)
+    departments = [f"department{i}" for i in range(64)]
+    done = 0
+    while done < commands:
+        batches = []
+        for _ in range(depth):
+            group = []
+            for i in range(batch):
+                department = rng.choice(departments)
+                r = rng.random()
+                if r < 0.5:
+                    group.append(["add", department, f"patient{seed}-{done + i}", rng.choice([None, 1, 2, 3, 4, 5])])
+                elif r < 0.8:
+                    group.append(["next", department])
+                else:
+                    group.append(["wait", department, f"patient{seed}-{rng.randrange(done + 1)}"])
+            batches.append(group)
+            done += batch
+        client.execute(batches)
+    client.close()
+    return done
+
+
+def shard_benchmark(max_shards: int = 4, commands: int = 200_000, batch: int = 64, depth: int = 4,
+                    port: int = SHARD_PORT, unix: str | None = None):
+    """Throughput of the sharded server with 1, 2, 4 ... max_shards shards and as many client processes."""
+    print(f"{commands:,} commands per run, batches of {batch}, {depth} batches in flight per client "
+          f"({os.cpu_count()} CPUs):")
+    shards = 1
+    while shards <= max_shards:
+        processes = start_shards(shards, port, unix)
+        jobs = [(shards, port, unix, commands // shards, batch, depth, seed) for seed in range(shards)]
+        with ProcessPoolExecutor(max_workers=shards) as pool:
+            start = time.perf_counter()
+            total = sum(pool.map(_shard_bench_client, jobs))
+            elapsed = time.perf_counter() - start
+        for process in processes:
+            process.terminate()
+            process.join()
+        print(f"  {shards} shard(s): {total / elapsed:,.0f} commands/s")
+        shards *= 2
+
+
 # Main Menu
 
 
@@ -87,7 +1286,10 @@ def main():
         print("2. View Queues")
         print("3. Call Next Patient")
         print("4. Check Patient Wait Time")
-        print("5. Exit")
+        print("5. Cancel Patient")
+        print("6. Re-triage Patient")
+        print("7. Forecast Wait Times")
+        print("8. Exit")
         choice = input("Choose an option: ")
 
         if choice == "1":
@@ -99,10 +1301,64 @@ def main():
         elif choice == "4":
             check_wait_time()
         elif choice == "5":
+            cancel_patient()
+        elif choice == "6":
+            retriage_patient()
+        elif choice == "7":
+            forecast_wait_times()
+        elif choice == "8":
             print("Exiting...")
             break
         else:
             print("Invalid choice. Try again.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Hospital Patient Queue")
+    parser.add_argument("--bench", type=int, nargs="?", const=200_000, metavar="N",
+                        help="benchmark PatientQueue against a heap with N patients and exit")
+    parser.add_argument("--load-test", type=int, nargs="?", const=50_000, metavar="N",
+                        help="run the async multi-desk service with N patients and report latencies")
+    parser.add_argument("--desks", type=int, default=8, help="intake desks for --load-test")
+    parser.add_argument("--doctors", type=int, default=4, help="doctors for --load-test")
+    parser.add_argument("--batch", type=int, default=1, help="patients per request for --load-test")
+    parser.add_argument("--wal-bench", type=int, nargs="?", const=2_000_000, metavar="N",
+                        help="log N queue changes with group commit, time recovery and exit")
+    parser.add_argument("--forecast-bench", type=int, nargs="?", const=200, metavar="N",
+                        help="time a wait-time forecast for N waiting patients and exit")
+    parser.add_argument("--workers", type=int, default=1, help="processes for --forecast-bench")
+    parser.add_argument("--serve", type=int, metavar="SHARDS",
+                        help="run the sharded department queue server with SHARDS worker processes")
+    parser.add_argument("--shard-bench", type=int, nargs="?", const=4, metavar="MAX_SHARDS",
+                        help="measure server throughput with 1, 2, 4 ... MAX_SHARDS shards and exit")
+    parser.add_argument("--port", type=int, default=SHARD_PORT, help="first shard port for --serve/--shard-bench")
+    parser.add_argument("--unix", metavar="PATH", help="serve shards on Unix sockets PATH.0, PATH.1 ...")
+    parser.add_argument("--eta-bench", type=int, nargs="?", const=10_000, metavar="N",
+                        help="compare pushed ETA deltas with full recomputation for N waiting patients and exit")
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(args.bench)
+    elif args.wal_bench:
+        wal_benchmark(args.wal_bench)
+    elif args.serve:
+        for process in start_shards(args.serve, args.port, args.unix):
+            try:
+                process.join()
+            except KeyboardInterrupt:
+                pass
+    elif args.shard_bench:
+        shard_benchmark(args.shard_bench, port=args.port, unix=args.unix)
+    elif args.eta_bench:
+        eta_benchmark(args.eta_bench)
+    elif args.forecast_bench:
+        forecast_benchmark(args.forecast_bench, workers=args.workers)
+    elif args.load_test:
+        stats = asyncio.run(load_test(args.desks, args.doctors, args.load_test, args.batch))
+        print(f"{stats['patients']} patients through {args.desks} desks / {args.doctors} doctors "
+              f"in {stats['seconds']:.2f}s ({stats['ops_per_sec']:,.0f} ops/s)")
+        print(f"  add:  p50 {stats['add_p50_ms']:.3f} ms  p99 {stats['add_p99_ms']:.3f} ms")
+        print(f"  call: p50 {stats['call_p50_ms']:.3f} ms  p99 {stats['call_p99_ms']:.3f} ms")
+    else:
+        queue = WriteAheadLog().recover()
+        main()
+        queue.wal.snapshot(queue)
+        queue.wal.close()
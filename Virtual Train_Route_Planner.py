@@ -1,30 +1,315 @@
 from __future__ import annotations
+import argparse
+import asyncio
+import heapq
+import json
+import math
+import random
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
 from dataclasses import dataclass
+from itertools import accumulate
 from typing import Optional, Iterable
 
 
+SERVICE_MIN_PER_HOP = 2  # default minutes between adjacent stations
+ROUTE_BLOCK = 256  # stations per block of the position index (blocks hold 1x-2x this)
+
+
 # Node definitions
 
-@dataclass
+@dataclass(slots=True, eq=False)  # no per-node __dict__; nodes compare by identity
 class DLNode:
     name: str
     prev: Optional['DLNode'] = None
     next: Optional['DLNode'] = None
+    minutes: float = SERVICE_MIN_PER_HOP  # travel time from the previous station
+    block: Optional[RouteBlock] = None    # position index block; see IndexedRoute
+
+
+class FenwickTree:
+    """Binary indexed tree of sums: O(log n) point update and prefix sum.
+
+    Grows by doubling so callers can keep using ever-increasing indexes.
+    """
+
+    def __init__(self, size: int = 16):
+        self.tree = [0] * (1 << max(size - 1, 1).bit_length()) + [0]
+
+    def _grow(self, index: int):
+        # The size stays a power of two; after doubling, only the new last node covers old entries.
+        while len(self.tree) - 1 <= index:
+            size = len(self.tree) - 1
+            total = self.prefix(size)
+            self.tree.extend([0] * size)
+            self.tree[-1] = total
+
+    @classmethod
+    def from_values(cls, values: list) -> FenwickTree:
+        """Build in O(n) from the entries at indexes 0, 1, 2..."""
+        fenwick = cls(len(values))
+        tree = fenwick.tree
+        tree[1:len(values) + 1] = values
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        return fenwick
+
+    def add(self, index: int, delta):
+        tree = self.tree
+        if index >= len(tree) - 1:
+            self._grow(index)
+            tree = self.tree
+        i = index + 1
+        n = len(tree)
+        while i < n:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, count: int):
+        """Sum of entries [0, count)."""
+        i = min(count, len(self.tree) - 1)
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def search(self, target: int) -> tuple[int, int]:
+        """For non-negative counts: (index, offset) of the target-th unit, counting from 0."""
+        tree = self.tree
+        pos = 0
+        step = len(tree) - 1  # a power of two
+        while step:
+            if pos + step < len(tree) and tree[pos + step] <= target:
+                pos += step
+                target -= tree[pos]
+            step >>= 1
+        return pos, target
+
+
+
+# Station index shared by both route kinds
+
+class RouteBlock:
+    """A run of consecutive stations; see IndexedRoute."""
+
+    __slots__ = ("nodes", "index", "minutes", "prefix", "synced")
+
+    def __init__(self, nodes: list[DLNode]):
+        self.nodes = nodes
+        self.index = 0
+        self.minutes = sum(node.minutes for node in nodes)
+        self.prefix: Optional[list] = None  # running minutes within the block, rebuilt on demand
+        self.synced = (0, 0)  # (stations, minutes) as last added to the route's Fenwick trees
+
+    def running_minutes(self) -> list:
+        if self.prefix is None:
+            self.prefix = list(accumulate(node.minutes for node in self.nodes))
+        return self.prefix
+
+
+class IndexedRoute(ABC):
+    """Case-folded station name -> node index, station count and travel-time index.
+
+    Subclasses call _register right after linking a node and _unregister
+    right before unlinking it, which keeps find and len O(1). If two
+    stations share a name, find returns the one nearest the start of the
+    route, O(log n) per stop with that name.
+
+    For positions and travel times the stations are also kept, in route
+    order, in blocks of up to 2 * ROUTE_BLOCK nodes, with two Fenwick trees
+    over the blocks holding their station counts and segment minutes. A
+    station's position, or the minutes between two stations, is a prefix
+    sum over the blocks before it plus an offset inside its block:
+    O(log n + ROUTE_BLOCK). An edit only touches one block, and changed
+    blocks are pushed to the trees at the next query; a block that fills
+    up is split and an emptied one dropped, and only when a split or drop
+    shifts later blocks are the trees rebuilt (O(n / ROUTE_BLOCK)).
+    """
+
+    def __init__(self):
+        self._index: dict[str, list[DLNode]] = {}
+        self._size = 0
+        self.version = 0  # bumped by every edit, so derived data can tell it is stale
+        self._blocks: list[RouteBlock] = []
+        self._stations = FenwickTree()
+        self._minutes = FenwickTree()
+        self._dirty: set[RouteBlock] = set()  # blocks changed since the trees were last updated
+
+    def _register(self, node: DLNode):
+        self._index.setdefault(node.name.casefold(), []).append(node)
+        self._size += 1
+        self.version += 1
+        self._place(node)
+
+    def _unregister(self, node: DLNode):
+        key = node.name.casefold()
+        nodes = self._index[key]
+        nodes.remove(node)
+        if not nodes:
+            del self._index[key]
+        self._size -= 1
+        self.version += 1
+        nxt = node.next
+        if nxt is not None and nxt is not node:
+            # the following station is now reached through where this one was
+            nxt.minutes += node.minutes
+            nxt.block.minutes += node.minutes
+            nxt.block.prefix = None
+            self._dirty.add(nxt.block)
+        block = node.block
+        block.nodes.remove(node)
+        block.minutes -= node.minutes
+        block.prefix = None
+        node.block = None
+        self._dirty.add(block)
+        if not block.nodes:
+            del self._blocks[block.index]
+            self._reindex()
+
+    # --- positions ---
+    @abstractmethod
+    def _first(self) -> Optional[DLNode]:
+        """The first station in route order, or None for an empty route."""
+
+    def _before(self, node: DLNode) -> Optional[DLNode]:
+        return None if node is self._first() else node.prev
+
+    def _place(self, node: DLNode):
+        before = self._before(node)
+        if before is None:
+            if not self._blocks:
+                self._blocks.append(RouteBlock([]))
+            block, i = self._blocks[0], 0
+        else:
+            block = before.block
+            i = len(block.nodes) if block.nodes[-1] is before else block.nodes.index(before) + 1
+        block.nodes.insert(i, node)
+        block.minutes += node.minutes
+        block.prefix = None
+        node.block = block
+        self._dirty.add(block)
+        if len(block.nodes) > 2 * ROUTE_BLOCK:
+            moved = RouteBlock(block.nodes[ROUTE_BLOCK:])
+            del block.nodes[ROUTE_BLOCK:]
+            block.minutes -= moved.minutes
+            block.prefix = None
+            for other in moved.nodes:
+                other.block = moved
+            if block is self._blocks[-1]:  # growing at the end: no need to renumber
+                moved.index = len(self._blocks)
+                self._blocks.append(moved)
+                self._dirty.add(moved)
+            else:
+                self._blocks.insert(block.index + 1, moved)
+                self._reindex()
+
+    def _reindex(self):
+        for i, block in enumerate(self._blocks):
+            block.index = i
+            block.synced = (len(block.nodes), block.minutes)
+        self._dirty.clear()
+        self._stations = FenwickTree.from_values([len(block.nodes) for block in self._blocks])
+        self._minutes = FenwickTree.from_values([block.minutes for block in self._blocks])
+
+    def _sync(self):
+        for block in self._dirty:
+            stations, minutes = block.synced
+            self._stations.add(block.index, len(block.nodes) - stations)
+            self._minutes.add(block.index, block.minutes - minutes)
+            block.synced = (len(block.nodes), block.minutes)
+        self._dirty.clear()
+
+    def _total_minutes(self):
+        self._sync()
+        return self._minutes.prefix(len(self._blocks))
+
+    def _locate(self, node: DLNode) -> tuple:
+        """(position, minutes from the first station through this one)."""
+        self._sync()
+        block = node.block
+        i = block.nodes.index(node)
+        return (self._stations.prefix(block.index) + i,
+                self._minutes.prefix(block.index) + block.running_minutes()[i])
+
+    def position(self, node: DLNode) -> int:
+        """Number of stations before this one on the route."""
+        return self._locate(node)[0]
+
+    def minutes_between(self, a: DLNode, b: DLNode):
+        """Travel time riding forward from a to b (wrapping round a loop)."""
+        (pa, ma), (pb, mb) = self._locate(a), self._locate(b)
+        if pb >= pa:
+            return mb - ma
+        return self._total_minutes() + mb - ma  # only loops wrap
 
+    @abstractmethod
+    def travel_minutes(self, a: DLNode, b: DLNode):
+        """Shortest travel time between two stations, in either direction."""
+
+    @abstractmethod
+    def stops_between(self, a: DLNode, b: DLNode) -> int:
+        """Fewest stops from a to b, in either direction."""
+
+    @abstractmethod
+    def _wrap(self, position: int) -> int:
+        """Where a jump to this position lands; the route is not empty."""
+
+    def __getitem__(self, key):
+        """Station node by position, or a list of them for a slice: O(log n) to find the start."""
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._size)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            out = []
+            node = self[start] if start < stop else None
+            for _ in range(stop - start):
+                out.append(node)
+                node = node.next
+            return out
+        position = key + self._size if key < 0 else key
+        if not 0 <= position < self._size:
+            raise IndexError("station position out of range")
+        self._sync()
+        block, offset = self._stations.search(position)
+        return self._blocks[block].nodes[offset]
+
+    def advance(self, k: int) -> Optional[str]:
+        """Move the current station k stops forward (negative: back) in O(log n)."""
+        if not self.current:
+            return None
+        self.current = self[self._wrap(self.position(self.current) + k)]
+        return self.current.name
+
+    def find(self, station_name: str) -> Optional[DLNode]:
+        nodes = self._index.get(station_name.casefold())
+        if not nodes:
+            return None
+        return nodes[0] if len(nodes) == 1 else min(nodes, key=self.position)
+
+    def __len__(self):
+        return self._size
 
 
 # Doubly Linked Route (linear line)
 
-class DoublyLinkedRoute:
+class DoublyLinkedRoute(IndexedRoute):
     def __init__(self, name: str):
+        super().__init__()
         self.name = name
         self.head: Optional[DLNode] = None
         self.tail: Optional[DLNode] = None
         self.current: Optional[DLNode] = None
 
     # --- building / editing ---
-    def append(self, station_name: str) -> DLNode:
-        node = DLNode(station_name)
+    def append(self, station_name: str, minutes: float = SERVICE_MIN_PER_HOP) -> DLNode:
+        """Add a station at the end, `minutes` after the current last one."""
+        node = DLNode(station_name, minutes=minutes)
         if not self.head:
             self.head = self.tail = self.current = node
         else:
@@ -32,13 +317,15 @@ class DoublyLinkedRoute:
             self.tail.next = node
             node.prev = self.tail
             self.tail = node
+        self._register(node)
         return node
 
-    def insert_after(self, target_name: str, station_name: str) -> bool:
+    def insert_after(self, target_name: str, station_name: str, minutes: float = SERVICE_MIN_PER_HOP) -> bool:
+        """Add a station `minutes` after the target; the next station keeps its own travel time."""
         target = self.find(target_name)
         if not target:
             return False
-        new_node = DLNode(station_name)
+        new_node = DLNode(station_name, minutes=minutes)
         nxt = target.next
         target.next = new_node
         new_node.prev = target
@@ -47,12 +334,14 @@ class DoublyLinkedRoute:
             nxt.prev = new_node
         else:
             self.tail = new_node
+        self._register(new_node)
         return True
 
     def remove(self, station_name: str) -> bool:
         node = self.find(station_name)
         if not node:
             return False
+        self._unregister(node)
         if node.prev:
             node.prev.next = node.next
         else:
@@ -86,13 +375,18 @@ class DoublyLinkedRoute:
         return False
 
     # --- helpers ---
-    def find(self, station_name: str) -> Optional[DLNode]:
-        cur = self.head
-        while cur:
-            if cur.name.lower() == station_name.lower():
-                return cur
-            cur = cur.next
-        return None
+    def _first(self) -> Optional[DLNode]:
+        return self.head
+
+    def travel_minutes(self, a: DLNode, b: DLNode):
+        (_, ma), (_, mb) = self._locate(a), self._locate(b)
+        return abs(mb - ma)
+
+    def stops_between(self, a: DLNode, b: DLNode) -> int:
+        return abs(self.position(b) - self.position(a))
+
+    def _wrap(self, position: int) -> int:
+        return min(max(position, 0), self._size - 1)  # a line stops at its ends
 
     def to_list(self) -> list[str]:
         out = []
@@ -102,22 +396,25 @@ class DoublyLinkedRoute:
             cur = cur.next
         return out
 
-    def __len__(self):
-        return len(self.to_list())
-
 
 
 # Circular Linked Route (loop line)
 
-class CircularRoute:
+class CircularRoute(IndexedRoute):
     def __init__(self, name: str):
+        super().__init__()
         self.name = name
         self.tail: Optional[DLNode] = None  # tail.next points to head
         self.current: Optional[DLNode] = None
 
     # --- building / editing ---
-    def append(self, station_name: str) -> DLNode:
-        node = DLNode(station_name)
+    def append(self, station_name: str, minutes: float = SERVICE_MIN_PER_HOP) -> DLNode:
+        """Add a station at the end, `minutes` after the current last one.
+
+        The first station's minutes is the run from the last station back
+        round to it.
+        """
+        node = DLNode(station_name, minutes=minutes)
         if not self.tail:
             # first node points to itself both ways
             node.next = node.prev = node
@@ -131,13 +428,15 @@ class CircularRoute:
             self.tail.next = node
             head.prev = node
             self.tail = node
+        self._register(node)
         return node
 
-    def insert_after(self, target_name: str, station_name: str) -> bool:
+    def insert_after(self, target_name: str, station_name: str, minutes: float = SERVICE_MIN_PER_HOP) -> bool:
+        """Add a station `minutes` after the target; the next station keeps its own travel time."""
         target = self.find(target_name)
         if not target:
             return False
-        new_node = DLNode(station_name)
+        new_node = DLNode(station_name, minutes=minutes)
         nxt = target.next
         target.next = new_node
         new_node.prev = target
@@ -146,12 +445,14 @@ class CircularRoute:
             nxt.prev = new_node
         if target is self.tail:
             self.tail = new_node
+        self._register(new_node)
         return True
 
     def remove(self, station_name: str) -> bool:
         node = self.find(station_name)
         if not node:
             return False
+        self._unregister(node)
         if node.next is node and node.prev is node:
             # only one node
             self.tail = self.current = None
@@ -189,6 +490,21 @@ class CircularRoute:
     def head(self) -> Optional[DLNode]:
         return None if not self.tail else self.tail.next
 
+    _first = head
+
+    def travel_minutes(self, a: DLNode, b: DLNode):
+        if a is b:
+            return 0
+        forward = self.minutes_between(a, b)
+        return min(forward, self._total_minutes() - forward)
+
+    def stops_between(self, a: DLNode, b: DLNode) -> int:
+        forward = (self.position(b) - self.position(a)) % self._size
+        return min(forward, self._size - forward)
+
+    def _wrap(self, position: int) -> int:
+        return position % self._size
+
     def to_list(self, limit: int | None = None) -> list[str]:
         out = []
         if not self.tail:
@@ -206,27 +522,673 @@ class CircularRoute:
                 break
         return out
 
-    def find(self, station_name: str) -> Optional[DLNode]:
-        if not self.tail:
-            return None
-        start = self.tail.next
-        cur = start
-        while True:
-            if cur.name.lower() == station_name.lower():
-                return cur
-            cur = cur.next
-            if cur is start:
-                break
+
+
+# Array-backed route (very long lines)
+
+NIL = -1
+
+
+class ArrayRoute:
+    """Linear or loop route stored in parallel arrays instead of node objects.
+
+    A station is a slot number: its name is names[slot] and its neighbours
+    are prev[slot] and next[slot], kept as machine ints in array('l')
+    (NIL at the ends of a linear line). Removed slots go on a free list and
+    are reused by the next insertion. The name index maps a case-folded
+    name to a slot, or to a list of slots when a name repeats. Same
+    building and navigation API as DoublyLinkedRoute / CircularRoute, with
+    slot numbers in place of nodes.
+    """
+
+    def __init__(self, name: str, circular: bool = False):
+        self.name = name
+        self.circular = circular
+        self.names: list[Optional[str]] = []
+        self.prev = array('l')
+        self.next = array('l')
+        self.free = array('l')
+        self.head = self.tail = self.current = NIL
+        self._index: dict[str, int | list[int]] = {}
+        self._size = 0
+
+    # --- slots ---
+    def _new_slot(self, station_name: str) -> int:
+        if self.free:
+            slot = self.free.pop()
+            self.names[slot] = station_name
+        else:
+            slot = len(self.names)
+            self.names.append(station_name)
+            self.prev.append(NIL)
+            self.next.append(NIL)
+        key = station_name.casefold()
+        found = self._index.get(key)
+        if found is None:
+            self._index[key] = slot
+        elif isinstance(found, int):
+            self._index[key] = [found, slot]
+        else:
+            found.append(slot)
+        self._size += 1
+        return slot
+
+    def _free_slot(self, slot: int):
+        key = self.names[slot].casefold()
+        found = self._index[key]
+        if isinstance(found, int):
+            del self._index[key]
+        else:
+            found.remove(slot)
+            if len(found) == 1:
+                self._index[key] = found[0]
+        self.names[slot] = None
+        self.free.append(slot)
+        self._size -= 1
+
+    # --- building / editing ---
+    def append(self, station_name: str) -> int:
+        slot = self._new_slot(station_name)
+        if self.head == NIL:
+            self.head = self.tail = self.current = slot
+            self.prev[slot] = self.next[slot] = slot if self.circular else NIL
+            return slot
+        self._link_after(self.tail, slot)
+        return slot
+
+    def insert_after(self, target_name: str, station_name: str) -> bool:
+        target = self.find(target_name)
+        if target is None:
+            return False
+        self._link_after(target, self._new_slot(station_name))
+        return True
+
+    def _link_after(self, target: int, slot: int):
+        nxt = self.next[target]
+        self.prev[slot] = target
+        self.next[slot] = nxt
+        self.next[target] = slot
+        if nxt != NIL:
+            self.prev[nxt] = slot
+        if target == self.tail:
+            self.tail = slot
+
+    def remove(self, station_name: str) -> bool:
+        slot = self.find(station_name)
+        if slot is None:
+            return False
+        prv, nxt = self.prev[slot], self.next[slot]
+        if self._size == 1:
+            self.head = self.tail = self.current = NIL
+        else:
+            if prv != NIL:
+                self.next[prv] = nxt
+            if nxt != NIL:
+                self.prev[nxt] = prv
+            if slot == self.head:
+                self.head = nxt
+            if slot == self.tail:
+                self.tail = prv
+            if slot == self.current:
+                self.current = nxt if nxt != NIL else prv
+        self._free_slot(slot)
+        return True
+
+    # --- navigation ---
+    def move_forward(self) -> Optional[str]:
+        if self.current != NIL and self.next[self.current] != NIL:
+            self.current = self.next[self.current]
+            return self.names[self.current]
         return None
 
+    def move_back(self) -> Optional[str]:
+        if self.current != NIL and self.prev[self.current] != NIL:
+            self.current = self.prev[self.current]
+            return self.names[self.current]
+        return None
+
+    def set_current(self, station_name: str) -> bool:
+        slot = self.find(station_name)
+        if slot is not None:
+            self.current = slot
+            return True
+        return False
+
+    # --- helpers ---
+    def find(self, station_name: str) -> Optional[int]:
+        """Slot of the station nearest the head; a repeated name walks the route to tell its slots apart."""
+        found = self._index.get(station_name.casefold())
+        if not isinstance(found, list):
+            return found
+        slots = set(found)
+        slot = self.head
+        while slot not in slots:
+            slot = self.next[slot]
+        return slot
+
+    def current_name(self) -> Optional[str]:
+        return None if self.current == NIL else self.names[self.current]
+
+    def to_list(self, limit: int | None = None) -> list[str]:
+        out = []
+        names, nxt = self.names, self.next
+        slot = self.head
+        count = self._size if limit is None else min(limit, self._size)
+        for _ in range(count):
+            out.append(names[slot])
+            slot = nxt[slot]
+        return out
+
     def __len__(self):
-        return len(self.to_list())
+        return self._size
 
 
+# Multi-line network
 
-# Simple CLI demo (real-time navigation)
+TRANSFER_MIN = 5  # minutes to change lines at an interchange
+
+
+class Network:
+    """Routes linked at interchanges: stations whose names match on different lines.
+
+    A station is every stop with its name, on any line: a line may pass
+    through the same station twice, and changing between any two of its
+    stops costs transfer_minutes. Journeys ride lines in either direction,
+    taking the shorter way round a loop. shortest_path is a plain Dijkstra
+    over every stop; fastest and journey instead use a hub index: the
+    interchange stops of each line with their running minutes, plus a
+    table of the fastest times between interchange stops over the small
+    graph they form (one row per stop, filled in on first use). A query is
+    then the best of riding straight there on a shared line, or riding to
+    an interchange on the first line, looking up the table, and riding
+    from an interchange on the last line.
+
+    Route versions are checked before each query. Only the edited lines
+    are re-read and have their interchange stops located again, along with
+    the lines at a station that has just become, or stopped being, an
+    interchange. The table rows are dropped only if that changed the graph
+    of interchange stops, so an edit away from the interchanges keeps them.
+    """
+
+    def __init__(self, routes: Iterable[IndexedRoute] = (), transfer_minutes: float = TRANSFER_MIN):
+        self.routes: dict[str, IndexedRoute] = {}
+        self.transfer_minutes = transfer_minutes
+        self._versions: dict[str, int] = {}        # route version the index was built from
+        self._keys: dict[str, dict[str, int]] = {}  # route name -> its station names, case-folded, with stop counts
+        self._lines_at: dict[str, set[str]] = {}    # station key -> names of the routes stopping there
+        self._interchanges: set[str] = set()        # station keys with two or more stops
+        self._hubs: dict[str, list[tuple]] = {}     # route name -> [(running minutes, key, hub id)] in route order
+        self._hub_at: dict[int, tuple] = {}         # hub id -> (route name, station key, stop)
+        self._hub_ids: dict[DLNode, int] = {}       # interchange stop -> hub id
+        self._by_key: dict[str, set[int]] = {}      # station key -> hub ids of its stops
+        self._edges: dict[int, list[tuple]] = {}    # hub id -> [(hub id, minutes)] to its neighbours on the line
+        self._rows: dict[int, tuple[dict, dict]] = {}  # hub id -> (minutes to reachable hubs, predecessors)
+        self._next_hub = 0
+        for route in routes:
+            self.add_route(route)
+
+    def add_route(self, route: IndexedRoute):
+        self.routes[route.name] = route
+        self._versions[route.name] = -1
+
+    def remove_route(self, name: str):
+        del self.routes[name]
+        self._versions[name] = -1
+
+    # --- index maintenance ---
+    def _refresh(self):
+        stale = [name for name in self._versions if name not in self.routes
+                 or self.routes[name].version != self._versions[name]]
+        if not stale:
+            return
+        relocate = set(stale)
+        for name in stale:
+            route = self.routes.get(name)
+            keys = {key: len(nodes) for key, nodes in route._index.items()} if route else {}
+            old = self._keys.pop(name, {})
+            if route:
+                self._keys[name] = keys
+            for key in old.keys() | keys.keys():
+                if old.get(key) == keys.get(key):
+                    continue
+                if key not in keys:
+                    self._lines_at[key].discard(name)
+                    if not self._lines_at[key]:
+                        del self._lines_at[key]
+                elif key not in old:
+                    self._lines_at.setdefault(key, set()).add(name)
+                if self._update_interchange(key):
+                    relocate.update(self._lines_at.get(key, ()))
+            if route:
+                self._versions[name] = route.version
+            else:
+                del self._versions[name]
+        changed = False
+        for name in relocate:
+            changed |= self._locate_hubs(name)
+        if changed:
+            self._rows.clear()
+
+    def _update_interchange(self, key: str) -> bool:
+        """Recount a station's stops; True if it became or stopped being an interchange."""
+        stops = sum(self._keys[name][key] for name in self._lines_at.get(key, ()))
+        if (stops > 1) == (key in self._interchanges):
+            return False
+        if stops > 1:
+            self._interchanges.add(key)
+        else:
+            self._interchanges.discard(key)
+        return True
+
+    def _locate_hubs(self, name: str) -> bool:
+        """Find a line's interchange stops and the rides between them; True if the hub graph changed."""
+        route = self.routes.get(name)
+        stops = []
+        if route:
+            for key in self._interchanges.intersection(self._keys[name]):
+                stops.extend((route._locate(node), key, node) for node in route._index[key])
+            stops.sort(key=lambda stop: stop[0])
+        old = self._hubs.pop(name, [])
+        old_edges = {hub: self._edges.pop(hub) for _, _, hub in old}
+        hubs = []
+        for (_, minutes), key, node in stops:
+            hub = self._hub_ids.get(node)
+            if hub is None:
+                hub = self._hub_ids[node] = self._next_hub
+                self._next_hub += 1
+                self._hub_at[hub] = (name, key, node)
+                self._by_key.setdefault(key, set()).add(hub)
+            hubs.append((minutes, key, hub))
+            self._edges[hub] = []
+        for _, key, hub in old:
+            if hub not in self._edges:  # no longer an interchange stop
+                del self._hub_ids[self._hub_at.pop(hub)[2]]
+                self._by_key[key].discard(hub)
+                if not self._by_key[key]:
+                    del self._by_key[key]
+        if route:
+            self._hubs[name] = hubs
+            pairs = list(zip(hubs, hubs[1:]))
+            if isinstance(route, CircularRoute) and len(hubs) > 2:
+                pairs.append((hubs[-1], hubs[0]))
+            for (ma, _, a), (mb, _, b) in pairs:
+                minutes = self._ride(route, ma, mb)
+                self._edges[a].append((b, minutes))
+                self._edges[b].append((a, minutes))
+        return old_edges != {hub: self._edges[hub] for _, _, hub in hubs}
+
+    def _row(self, source: int) -> tuple[dict, dict]:
+        """Fastest times from one interchange stop to all others, computed on first use."""
+        row = self._rows.get(source)
+        if row is None:
+            dist = {source: 0}
+            prev = {}
+            heap = [(0, source)]
+            while heap:
+                d, hub = heapq.heappop(heap)
+                if d > dist[hub]:
+                    continue
+                transfers = [(other, self.transfer_minutes)
+                             for other in self._by_key[self._hub_at[hub][1]] if other != hub]
+                for other, minutes in self._edges[hub] + transfers:
+                    if d + minutes < dist.get(other, math.inf):
+                        dist[other] = d + minutes
+                        prev[other] = hub
+                        heapq.heappush(heap, (d + minutes, other))
+            row = self._rows[source] = (dist, prev)
+        return row
+
+    @staticmethod
+    def _ride(route: IndexedRoute, ma, mb):
+        """Minutes between two stops of a route, given their running minutes."""
+        d = abs(mb - ma)
+        if isinstance(route, CircularRoute):
+            return min(d, route._total_minutes() - d)
+        return d
+
+    # --- queries ---
+    def _nodes(self, key: str):
+        """(route name, stop) for every stop of a station."""
+        for name in self._lines_at.get(key, ()):
+            for node in self.routes[name]._index[key]:
+                yield name, node
+
+    def _stops(self, station: str) -> list[tuple]:
+        return [(name, self.routes[name], self.routes[name]._locate(node)[1])
+                for name, node in self._nodes(station.casefold())]
+
+    def _best(self, src: str, dst: str):
+        self._refresh()
+        starts, ends = self._stops(src), self._stops(dst)
+        best = (math.inf, None)
+        for name, route, ma in starts:
+            for other, _, mb in ends:
+                if other == name and self._ride(route, ma, mb) < best[0]:
+                    best = (self._ride(route, ma, mb), (name,))
+        for name, route, ma in starts:
+            first = [(self._ride(route, ma, mh), hub) for mh, _, hub in self._hubs[name]]
+            for other, last_route, mb in ends:
+                last = [(self._ride(last_route, mh, mb), hub) for mh, _, hub in self._hubs[other]]
+                for ride_in, a in first:
+                    dist = self._row(a)[0]
+                    for ride_out, b in last:
+                        total = ride_in + dist.get(b, math.inf) + ride_out
+                        if total < best[0]:
+                            best = (total, (name, a, b, other))
+        return best
+
+    def fastest(self, src: str, dst: str) -> Optional[float]:
+        """Minutes of the fastest journey between two stations, or None if they are not connected."""
+        minutes, _ = self._best(src, dst)
+        return None if minutes == math.inf else minutes
+
+    def journey(self, src: str, dst: str) -> Optional[tuple[float, list[str]]]:
+        """(minutes, legs) of the fastest journey, legs as printable steps."""
+        minutes, how = self._best(src, dst)
+        if how is None:
+            return None
+        if len(how) == 1:
+            return minutes, [f"{how[0]}: {src} -> {dst}"]
+        first, a, b, last = how
+        hubs = [b]
+        prev = self._row(a)[1]
+        while hubs[-1] != a:
+            hubs.append(prev[hubs[-1]])
+        hubs.reverse()
+        stops = [(first, src.casefold())] + [self._hub_at[h][:2] for h in hubs] + [(last, dst.casefold())]
+        legs = []
+        start = stops[0][1]
+        for (line_a, key_a), (line_b, key_b) in zip(stops, stops[1:]):
+            if line_b != line_a:  # a change of line at key_a
+                if key_a != start:
+                    legs.append(f"{line_a}: {self._name(line_a, start)} -> {self._name(line_a, key_a)}")
+                legs.append(f"change to {line_b} at {self._name(line_b, key_a)}")
+                start = key_a
+        line_last, key_last = stops[-1]
+        if key_last != start:
+            legs.append(f"{line_last}: {self._name(line_last, start)} -> {self._name(line_last, key_last)}")
+        return minutes, legs
+
+    def _name(self, line: str, key: str) -> str:
+        return self.routes[line]._index[key][0].name
+
+    def shortest_path(self, src: str, dst: str) -> Optional[float]:
+        """Dijkstra over every stop of every line; the reference for fastest."""
+        self._refresh()
+        targets = {node for _, node in self._nodes(dst.casefold())}
+        dist: dict[DLNode, float] = {}
+        heap = []
+        tie = 0
+        for name, node in self._nodes(src.casefold()):
+            heap.append((0, tie, node, name))
+            tie += 1
+        while heap:
+            d, _, node, name = heapq.heappop(heap)
+            if node in dist:
+                continue
+            dist[node] = d
+            if node in targets:
+                return d
+            steps = []
+            if node.next is not None:
+                steps.append((node.next, name, node.next.minutes))
+            if node.prev is not None:
+                steps.append((node.prev, name, node.minutes))
+            key = node.name.casefold()
+            if key in self._interchanges:
+                steps.extend((other_node, other, self.transfer_minutes)
+                             for other, other_node in self._nodes(key) if other_node is not node)
+            for nxt, line, minutes in steps:
+                if nxt not in dist:
+                    tie += 1
+                    heapq.heappush(heap, (d + minutes, tie, nxt, line))
+        return None
+
+
+# Train simulation
+
+SIM_TICK_MIN = 1.0  # simulated minutes per tick
+DWELL_MIN = 0.5     # minutes a train stands at each station
+SIM_CHUNK = 4096    # arrivals handled between yields to the event loop
+
+
+class Simulation:
+    """Many trains running up and down lines and round loops, advanced a tick at a time.
+
+    Train state lives in parallel arrays (route, direction, time due at
+    the next station) plus the node each train is heading for. Trains are
+    only touched when they reach a station: a calendar maps each tick to
+    the trains due in it, so a tick costs the number of arrivals, not the
+    number of trains. When a train leaves for a station it is pushed onto
+    that station's arrival heap, and on arrival the heap's past entries
+    are dropped, so "next arrival at S" is the top of a heap. Trains run
+    on the live routes; a line reverses at its ends.
+    """
+
+    def __init__(self, tick_minutes: float = SIM_TICK_MIN, dwell: float = DWELL_MIN):
+        self.now = 0.0
+        self.tick_minutes = tick_minutes
+        self.dwell = dwell
+        self.routes: list[IndexedRoute] = []
+        self.train_route = array('l')
+        self.train_dir = array('b')    # +1 towards next, -1 towards prev
+        self.train_due = array('d')    # minute the train reaches train_at
+        self.train_at: list[DLNode] = []
+        self.moves = 0
+        self._calendar: dict[int, list[int]] = {}       # tick number -> trains due in it
+        self._arrivals: dict[DLNode, list[tuple]] = {}  # station -> heap of (minute, train)
+        self._stop_cache: dict[str, list[tuple]] = {}
+        self._stop_versions: list[int] = []
+
+    def add_train(self, route: IndexedRoute, station: str | None = None, direction: int = 1) -> int:
+        """Put a train at a station (default: the first); it departs on the next tick."""
+        node = route.find(station) if station else route._first()
+        if node is None:
+            raise ValueError(f"no station {station!r} on {route.name}")
+        if route not in self.routes:
+            self.routes.append(route)
+        train = len(self.train_at)
+        self.train_route.append(self.routes.index(route))
+        self.train_dir.append(1 if direction >= 0 else -1)
+        self.train_due.append(self.now)
+        self.train_at.append(node)
+        self._schedule(train, node, self.now)
+        return train
+
+    def _schedule(self, train: int, node: DLNode, when: float):
+        self.train_at[train] = node
+        self.train_due[train] = when
+        self._calendar.setdefault(int(when // self.tick_minutes), []).append(train)
+        heap = self._arrivals.get(node)
+        if heap is None:
+            heap = self._arrivals[node] = []
+        heapq.heappush(heap, (when, train))
+
+    def advance(self, chunk: int = SIM_CHUNK):
+        """Run one tick, yielding every `chunk` arrivals so queries can be served meanwhile."""
+        tick = int(self.now // self.tick_minutes)
+        end = (tick + 1) * self.tick_minutes
+        dwell = self.dwell
+        train_dir, train_due, train_at = self.train_dir, self.train_due, self.train_at
+        handled = 0
+        while tick in self._calendar:
+            for train in self._calendar.pop(tick):
+                node, when, direction = train_at[train], train_due[train], train_dir[train]
+                heap = self._arrivals[node]
+                while heap and heap[0][0] <= when:
+                    heapq.heappop(heap)
+                nxt = node.next if direction > 0 else node.prev
+                if nxt is None:  # end of a line: turn back
+                    direction = train_dir[train] = -direction
+                    nxt = node.next if direction > 0 else node.prev
+                if nxt is None or nxt is node:  # single-station route
+                    nxt, travel = node, self.tick_minutes
+                else:
+                    travel = nxt.minutes if direction > 0 else node.minutes
+                if nxt.block is None:
+                    nxt = node  # the station was removed from the line; wait where we are
+                self._schedule(train, nxt, when + dwell + travel)
+                handled += 1
+                if handled % chunk == 0:
+                    yield
+        self.moves += handled
+        self.now = end
+
+    def tick(self):
+        for _ in self.advance():
+            pass
+
+    def _stops(self, station: str) -> list[tuple]:
+        """(route, node) for every stop of a station on the simulated routes, cached until a route is edited.
+
+        A line that passes through the station twice contributes both stops.
+        """
+        versions = [route.version for route in self.routes]
+        if versions != self._stop_versions:
+            self._stop_cache.clear()
+            self._stop_versions = versions
+        key = station.casefold()
+        stops = self._stop_cache.get(key)
+        if stops is None:
+            stops = self._stop_cache[key] = [(route, node) for route in self.routes
+                                             for node in route._index.get(key, ())]
+        return stops
+
+    def _heads(self, station: str):
+        for route, node in self._stops(station):
+            heap = self._arrivals.get(node)
+            if heap:
+                while heap and heap[0][0] < self.now:
+                    heapq.heappop(heap)
+                yield route, heap
+
+    def next_arrival(self, station: str) -> Optional[tuple[float, int, str]]:
+        """(minute, train, line) of the next train due at a station, or None."""
+        best = None
+        for route, heap in self._heads(station):
+            if heap and (best is None or heap[0][0] < best[0]):
+                best = (heap[0][0], heap[0][1], route.name)
+        return best
+
+    def upcoming(self, station: str, n: int = 5) -> list[tuple[float, int, str]]:
+        """The next n arrivals at a station, soonest first."""
+        found = [(when, train, route.name) for route, heap in self._heads(station)
+                 for when, train in heapq.nsmallest(n, heap)]
+        return sorted(found)[:n]
+
+
+class SimulationService:
+    """Runs a Simulation on the event loop and answers arrival lookups while it runs.
+
+    Ticks are computed in chunks with a yield to the loop between them, so
+    lookups are never stuck behind a whole tick. `serve` exposes the
+    lookups over TCP: each request line is a station name and each reply
+    line is a JSON object with the next arrival (or null).
+    """
+
+    def __init__(self, sim: Simulation, tick_seconds: float = 1.0):
+        self.sim = sim
+        self.tick_seconds = tick_seconds  # wall-clock time per tick; 0 runs flat out
+        self.ticks = 0
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            for _ in self.sim.advance():
+                await asyncio.sleep(0)
+            self.ticks += 1
+            await asyncio.sleep(max(0.0, self.tick_seconds - (loop.time() - started)))
+
+    async def next_arrival(self, station: str) -> Optional[tuple[float, int, str]]:
+        return self.sim.next_arrival(station)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 7500) -> asyncio.AbstractServer:
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            while line := await reader.readline():
+                found = self.sim.next_arrival(line.decode().strip())
+                reply = None if found is None else {"minute": found[0], "train": found[1], "line": found[2]}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+            writer.close()
 
-SERVICE_MIN_PER_HOP = 2  # pretend 2 minutes between adjacent stations
+        return await asyncio.start_server(handle, host, port)
+
+
+CACHE_SIZE = 4096  # answers kept by the planner's route cache
+
+
+class RouteCache:
+    """Bounded LRU of answers derived from routes: lookups, ETAs, renderings.
+
+    Entries are keyed by (route, route version, kind, *args), where args
+    are whatever else the answer depends on, such as the current station
+    and the target. The first request after a route's version moves on
+    drops every entry of that route, and only that route. Entries for the
+    other routes stay warm. Least recently used entries are evicted
+    beyond maxsize. A route is held only while it has entries, so a cache
+    never outlives its routes by more than maxsize answers.
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self._entries: OrderedDict[tuple, object] = OrderedDict()
+        self._keys: dict[object, set[tuple]] = {}  # route -> its keys in _entries
+        self._versions: dict[object, int] = {}     # route -> version those keys were computed at
+
+    def get(self, route, kind: str, *args, compute):
+        """Cached compute() for route at its current version."""
+        if self._versions.get(route, route.version) != route.version:
+            self.invalidate(route)
+        key = (route, route.version, kind, *args)
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            value = self._entries[key] = compute()
+            self._keys.setdefault(route, set()).add(key)
+            self._versions[route] = route.version
+            if len(self._entries) > self.maxsize:
+                old, _ = self._entries.popitem(last=False)
+                keys = self._keys[old[0]]
+                keys.discard(old)
+                if not keys:
+                    del self._keys[old[0]], self._versions[old[0]]
+            return value
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def invalidate(self, route):
+        """Drop every entry computed from route."""
+        keys = self._keys.pop(route, ())
+        for key in keys:
+            del self._entries[key]
+        self.invalidated += len(keys)
+        self._versions.pop(route, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "invalidated": self.invalidated,
+                "size": len(self._entries), "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+# Simple CLI demo (real-time navigation)
 
 class Planner:
     def __init__(self):
@@ -239,55 +1201,41 @@ class Planner:
         for s in ["A1", "A2", "A3", "A4"]:
             self.loop.append(s)
 
+        self.network = Network([self.line, self.loop])  # stations named alike on both lines are interchanges
+        self.cache = RouteCache()
+
     # ----- utility -----
-    def eta_from(self, route, target: str) -> Optional[int]:
+    def find(self, route, name: str) -> Optional[DLNode]:
+        return self.cache.get(route, "find", name.casefold(), compute=lambda: route.find(name))
+
+    def eta_from(self, route, target: str) -> Optional[float]:
+        """Minutes from the current station to target, the shorter way round."""
         if not route.current:
             return None
-        # BFS not needed on linked lines; just walk
-        steps_fwd = steps_back = None
+        return self.cache.get(route, "eta", route.current, target.casefold(),
+                              compute=lambda: self._eta(route, target))
 
-        # forward steps
-        steps = 0
-        node = route.current
-        visited_start = node
-        while True:
-            if node.name.lower() == target.lower():
-                steps_fwd = steps
-                break
-            # move next (wrap automatically for circular)
-            nxt = node.next if hasattr(node, 'next') else None
-            if not nxt:
-                # linear end reached
-                break
-            node = nxt
-            steps += 1
-            if isinstance(route, CircularRoute) and node is visited_start:
-                # full loop without hit
-                break
+    def _eta(self, route, target: str) -> Optional[float]:
+        node = self.find(route, target)
+        if node is None:
+            return None
+        return route.travel_minutes(route.current, node)
 
-        # backward steps
-        if getattr(route.current, 'prev', None) is not None:
-            steps = 0
-            node = route.current
-            visited_start = node
-            while True:
-                if node.name.lower() == target.lower():
-                    steps_back = steps
-                    break
-                prv = node.prev
-                if not prv:
-                    break
-                node = prv
-                steps += 1
-                if isinstance(route, CircularRoute) and node is visited_start:
-                    break
+    def stops_to(self, route, target: str) -> int:
+        return self.cache.get(route, "stops", route.current, target.casefold(),
+                              compute=lambda: route.stops_between(route.current, self.find(route, target)))
 
-        best = None
-        if steps_fwd is not None:
-            best = steps_fwd
-        if steps_back is not None and (best is None or steps_back < best):
-            best = steps_back
-        return None if best is None else best * SERVICE_MIN_PER_HOP
+    def render(self, route, sep: str) -> str:
+        return self.cache.get(route, "render", sep, compute=lambda: sep.join(route.to_list()))
+
+    @staticmethod
+    def ask_minutes() -> float:
+        answer = input(f"Minutes from the previous station [{SERVICE_MIN_PER_HOP}]: ")
+        try:
+            return float(answer) if answer else SERVICE_MIN_PER_HOP
+        except ValueError:
+            print(f"Not a number; using {SERVICE_MIN_PER_HOP} minutes.")
+            return SERVICE_MIN_PER_HOP
 
     # ----- menus -----
     def run(self):
@@ -298,7 +1246,9 @@ class Planner:
             print("3. Navigate Loop Line (circular)")
             print("4. Edit Linear Line")
             print("5. Edit Loop Line")
-            print("6. Exit")
+            print("6. Plan journey")
+            print("7. Cache stats")
+            print("8. Exit")
             c = input("Choose: ")
             if c == '1':
                 self.show_routes()
@@ -311,24 +1261,45 @@ class Planner:
             elif c == '5':
                 self.edit_loop()
             elif c == '6':
+                self.plan_journey()
+            elif c == '7':
+                self.show_cache_stats()
+            elif c == '8':
                 print("Goodbye!")
                 break
             else:
                 print("Invalid option.")
 
     def show_routes(self):
-        print(f"\n{self.line.name} (linear): {' <-> '.join(self.line.to_list())}")
+        print(f"\n{self.line.name} (linear): {self.render(self.line, ' <-> ')}")
         curL = self.line.current.name if self.line.current else 'None'
         print(f"Current @ {curL}")
-        print(f"{self.loop.name} (loop): {' -> '.join(self.loop.to_list())} -> (back to start)")
+        print(f"{self.loop.name} (loop): {self.render(self.loop, ' -> ')} -> (back to start)")
         curC = self.loop.current.name if self.loop.current else 'None'
         print(f"Current @ {curC}")
 
+    def show_cache_stats(self):
+        st = self.cache.stats()
+        print(f"\nRoute cache: {st['size']}/{st['maxsize']} entries, {st['hits']} hits, "
+              f"{st['misses']} misses ({st['hit_rate']:.0%} hit rate), {st['invalidated']} invalidated by edits")
+
+    def plan_journey(self):
+        src = input("From station: ")
+        dst = input("To station: ")
+        found = self.network.journey(src, dst)
+        if found is None:
+            print("No connection between those stations.")
+            return
+        minutes, legs = found
+        for leg in legs:
+            print(f"  {leg}")
+        print(f"Fastest journey: {minutes} min")
+
     def nav_linear(self):
         while True:
             cur = self.line.current.name if self.line.current else 'None'
             print(f"\n[Linear] Current: {cur}")
-            print("1. Next  2. Back  3. Jump to station  4. ETA to station  5. Back to main")
+            print("1. Next  2. Back  3. Jump to station  4. ETA to station  5. Move k stops  6. Back to main")
             c = input("Choose: ")
             if c == '1':
                 name = self.line.move_forward()
@@ -342,8 +1313,17 @@ class Planner:
             elif c == '4':
                 target = input("Station name: ")
                 eta = self.eta_from(self.line, target)
-                print(f"ETA to {target}: {eta} min" if eta is not None else "Station not reachable from here.")
+                print(f"ETA to {target}: {eta} min, {self.stops_to(self.line, target)} stops"
+                      if eta is not None else "Station not reachable from here.")
             elif c == '5':
+                try:
+                    k = int(input("Stops to move forward (+) or back (-): "))
+                except ValueError:
+                    print("Enter an integer.")
+                    continue
+                name = self.line.advance(k)
+                print(f"Now at: {name}" if name else "No stations.")
+            elif c == '6':
                 break
             else:
                 print("Invalid option.")
@@ -366,23 +1346,16 @@ class Planner:
             elif c == '4':
                 target = input("Station name: ")
                 eta = self.eta_from(self.loop, target)
-                print(f"ETA to {target}: {eta} min" if eta is not None else "Station not found.")
+                print(f"ETA to {target}: {eta} min, {self.stops_to(self.loop, target)} stops"
+                      if eta is not None else "Station not found.")
             elif c == '5':
                 try:
                     k = int(input("Steps to move forward (+) or back (-): "))
                 except ValueError:
                     print("Enter an integer.")
                     continue
-                if not self.loop.current:
-                    print("No stations.")
-                    continue
-                if k >= 0:
-                    for _ in range(k):
-                        self.loop.move_forward()
-                else:
-                    for _ in range(-k):
-                        self.loop.move_back()
-                print(f"Now at: {self.loop.current.name}")
+                name = self.loop.advance(k)
+                print(f"Now at: {name}" if name else "No stations.")
             elif c == '6':
                 break
             else:
@@ -395,11 +1368,11 @@ class Planner:
             c = input("Choose: ")
             if c == '1':
                 s = input("Station name: ")
-                self.line.append(s)
+                self.line.append(s, self.ask_minutes())
             elif c == '2':
                 t = input("After which station: ")
                 s = input("New station name: ")
-                print("OK" if self.line.insert_after(t, s) else "Target not found.")
+                print("OK" if self.line.insert_after(t, s, self.ask_minutes()) else "Target not found.")
             elif c == '3':
                 s = input("Station to remove: ")
                 print("Removed" if self.line.remove(s) else "Not found.")
@@ -415,11 +1388,11 @@ class Planner:
             c = input("Choose: ")
             if c == '1':
                 s = input("Station name: ")
-                self.loop.append(s)
+                self.loop.append(s, self.ask_minutes())
             elif c == '2':
                 t = input("After which station: ")
                 s = input("New station name: ")
-                print("OK" if self.loop.insert_after(t, s) else "Target not found.")
+                print("OK" if self.loop.insert_after(t, s, self.ask_minutes()) else "Target not found.")
             elif c == '3':
                 s = input("Station to remove: ")
                 print("Removed" if self.loop.remove(s) else "Not found.")
@@ -429,6 +1402,269 @@ class Planner:
                 print("Invalid option.")
 
 
+# Benchmark
+
+def walk_find(route, station_name: str) -> Optional[DLNode]:
+    """The old lookup: walk from the head comparing lowercased names."""
+    cur = route.head if isinstance(route, DoublyLinkedRoute) else route.head()
+    start = cur
+    while cur:
+        if cur.name.lower() == station_name.lower():
+            return cur
+        cur = cur.next
+        if cur is start:
+            break
+    return None
+
+
+def benchmark(n: int = 1_000_000, lookups: int = 20, seed: int = 1):
+    """Build n-station routes and time lookups and len against walking the list."""
+    rng = random.Random(seed)
+    for cls in (DoublyLinkedRoute, CircularRoute):
+        route = cls("Bench")
+        start = time.perf_counter()
+        for i in range(n):
+            route.append(f"Station {i}")
+        build = time.perf_counter() - start
+        targets = [f"station {rng.randrange(n)}" for _ in range(lookups)]
+
+        start = time.perf_counter()
+        for t in targets:
+            walk_find(route, t)
+        walked = (time.perf_counter() - start) / lookups
+        start = time.perf_counter()
+        for t in targets * 1000:
+            route.find(t)
+        indexed = (time.perf_counter() - start) / (lookups * 1000)
+        start = time.perf_counter()
+        len(route.to_list())
+        counted = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(1000):
+            len(route)
+        sized = (time.perf_counter() - start) / 1000
+
+        first = route.find("station 0")
+        nodes = [route.find(t) for t in targets]
+        start = time.perf_counter()
+        for node in nodes:
+            cur, minutes = first, 0
+            while cur is not node:
+                cur = cur.next
+                minutes += cur.minutes
+        walked_eta = (time.perf_counter() - start) / lookups
+        start = time.perf_counter()
+        for node in nodes * 1000:
+            route.travel_minutes(first, node)
+        indexed_eta = (time.perf_counter() - start) / (lookups * 1000)
+        k = n // 2
+        route.current = first
+        start = time.perf_counter()
+        for _ in range(k):
+            route.move_forward()
+        stepped = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(1000):
+            route.advance(k)
+        jumped = (time.perf_counter() - start) / 1000
+        middle = nodes[0].name
+        start = time.perf_counter()
+        for i in range(10_000):
+            route.insert_after(middle, f"Infill {i}")  # worst case: always the same gap
+        infill = (time.perf_counter() - start) / 10_000
+
+        print(f"{cls.__name__}, {n:,} stations (built in {build:.2f}s):")
+        print(f"  find: walk {walked * 1e3:.1f} ms, index {indexed * 1e6:.2f} us")
+        print(f"  len:  to_list {counted * 1e3:.1f} ms, counter {sized * 1e6:.2f} us")
+        print(f"  eta:  walk {walked_eta * 1e3:.1f} ms, prefix sums {indexed_eta * 1e6:.2f} us")
+        print(f"  jump {k:,} stops: move_forward loop {stepped * 1e3:.1f} ms, advance {jumped * 1e6:.2f} us")
+        print(f"  insert into one gap 10,000 times: {infill * 1e6:.1f} us each")
+
+
+def memory_benchmark(n: int = 1_000_000):
+    """Memory and speed of node-object routes vs ArrayRoute for n stations."""
+    names = [f"Station {i}" for i in range(n)]
+    removals = random.Random(1).sample(names, min(n, 10_000))
+    print(f"{n:,} stations:")
+    for label, make in (("DoublyLinkedRoute", lambda: DoublyLinkedRoute("Bench")),
+                        ("ArrayRoute", lambda: ArrayRoute("Bench"))):
+        tracemalloc.start()
+        start = time.perf_counter()
+        route = make()
+        for station in names:
+            route.append(station)
+        build = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        route.to_list()
+        walk = time.perf_counter() - start
+        start = time.perf_counter()
+        for station in removals:
+            route.remove(station)
+        for station in removals:
+            route.insert_after(names[0], station)
+        edits = time.perf_counter() - start
+        print(f"  {label + ':':19} {size / n:6.1f} bytes/station, build {build:.2f}s, "
+              f"traverse {walk * 1e3:.0f} ms, {2 * len(removals):,} edits {edits * 1e3:.0f} ms")
+        del route
+
+
+def network_benchmark(lines: int = 40, stations: int = 5_000, interchanges: int = 150,
+                      queries: int = 200, seed: int = 1):
+    """Hub-index queries against Dijkstra on a random network, plus the cost of an edit."""
+    rng = random.Random(seed)
+    routes = []
+    for i in range(lines):
+        route = (CircularRoute if i % 4 == 0 else DoublyLinkedRoute)(f"Line {i}")
+        for j in range(stations):
+            route.append(f"L{i} S{j}", rng.randint(1, 6))
+        for hub in rng.sample(range(interchanges), interchanges * 3 // lines + 2):
+            if not route.find(f"Hub {hub}"):
+                route.insert_after(f"L{i} S{rng.randrange(stations)}", f"Hub {hub}", rng.randint(1, 6))
+        routes.append(route)
+    network = Network(routes)
+    start = time.perf_counter()
+    network.fastest("L0 S0", "L1 S0")
+    built = time.perf_counter() - start
+
+    pairs = [(f"L{rng.randrange(lines)} S{rng.randrange(stations)}",
+              f"L{rng.randrange(lines)} S{rng.randrange(stations)}") for _ in range(queries)]
+    start = time.perf_counter()
+    fast = [network.fastest(a, b) for a, b in pairs]
+    hub_time = (time.perf_counter() - start) / queries
+    start = time.perf_counter()
+    slow = [network.shortest_path(a, b) for a, b in pairs[:20]]
+    dijkstra_time = (time.perf_counter() - start) / 20
+    assert fast[:20] == slow
+    start = time.perf_counter()
+    for a, b in pairs:
+        network.fastest(a, b)
+    warm_time = (time.perf_counter() - start) / queries
+
+    routes[1].append("L1 terminus", 2)  # past the line's last interchange: the table survives
+    start = time.perf_counter()
+    network.fastest("L0 S0", "L1 S0")
+    local = time.perf_counter() - start
+    routes[3].insert_after("L3 S10", "Hub 0", 2)  # a new interchange stop: the table is refilled
+    start = time.perf_counter()
+    network.fastest("L0 S0", "L1 S0")
+    rebuilt = time.perf_counter() - start
+    assert [network.fastest(a, b) for a, b in pairs[:20]] == [network.shortest_path(a, b) for a, b in pairs[:20]]
+
+    print(f"{lines} lines x {stations:,} stations, {len(network._hub_at)} interchange stops:")
+    print(f"  first query (builds the index) {built * 1e3:.0f} ms; first query after an edit "
+          f"away from the interchanges {local * 1e3:.1f} ms, after adding an interchange stop {rebuilt * 1e3:.0f} ms")
+    print(f"  fastest journey: Dijkstra {dijkstra_time * 1e3:.1f} ms, hub index {hub_time * 1e6:.0f} us "
+          f"(table filling in), {warm_time * 1e6:.0f} us warm")
+
+
+def simulation_benchmark(trains: int = 200_000, lines: int = 100, stations: int = 1_000, ticks: int = 20,
+                         seconds: float = 2.0, seed: int = 1):
+    """Tick cost with many trains, then arrival-lookup QPS while the simulation runs."""
+    rng = random.Random(seed)
+    sim = Simulation()
+    for i in range(lines):
+        route = (CircularRoute if i % 2 else DoublyLinkedRoute)(f"Line {i}")
+        for j in range(stations):
+            route.append(f"L{i} S{j}", rng.randint(1, 5))
+        for k in range(trains // lines):
+            sim.add_train(route, f"L{i} S{k * stations * lines // trains}", rng.choice([1, -1]))
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sim.tick()
+    elapsed = time.perf_counter() - start
+    print(f"{len(sim.train_at):,} trains on {lines} lines x {stations:,} stations:")
+    print(f"  {elapsed / ticks * 1e3:.0f} ms per tick, {sim.moves / elapsed:,.0f} station arrivals/s")
+
+    async def lookups(tick_seconds: float) -> tuple[int, int]:
+        service = SimulationService(sim, tick_seconds)
+        await service.start()
+        names = [f"L{rng.randrange(lines)} S{rng.randrange(stations)}" for _ in range(10_000)]
+        done = 0
+        deadline = time.perf_counter() + seconds
+
+        async def client(offset: int):
+            nonlocal done
+            i = offset
+            while time.perf_counter() < deadline:
+                for _ in range(100):
+                    await service.next_arrival(names[i % len(names)])
+                    i += 1
+                done += 100
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*(client(c * 997) for c in range(8)))
+        await service.stop()
+        return done, service.ticks
+
+    for label, tick_seconds in (("ticking flat out", 0), ("one tick a second", 1.0)):
+        done, ran = asyncio.run(lookups(tick_seconds))
+        print(f"  {label}: {done / seconds:,.0f} lookups/s, {ran / seconds:.1f} ticks/s")
+
+
+def cache_benchmark(n: int = 100_000, queries: int = 200_000, hot: int = 500, edit_every: int = 10_000,
+                    seed: int = 1):
+    """ETA and rendering requests against a hot set of stations, uncached and through the route cache."""
+    rng = random.Random(seed)
+    planner = Planner()
+    route = planner.line = DoublyLinkedRoute("Bench Line")
+    for i in range(n):
+        route.append(f"S{i}", rng.randint(1, 5))
+    picks = [(f"S{rng.randrange(n)}", f"S{rng.randrange(n)}") for _ in range(hot)]
+    plan = [picks[rng.randrange(hot)] for _ in range(queries)]
+
+    def run(eta, render) -> float:
+        edits = 0
+        start = time.perf_counter()
+        for i, (here, there) in enumerate(plan, 1):
+            route.set_current(here)
+            eta(route, there)
+            if i % 100 == 0:
+                render(route, " <-> ")
+            if i % edit_every == 0:
+                route.insert_after(here, f"E{edits}", 1)
+                edits += 1
+        return time.perf_counter() - start
+
+    def uncached_eta(r, target):
+        node = r.find(target)
+        return None if node is None else r.travel_minutes(r.current, node)
+
+    plain = run(uncached_eta, lambda r, sep: sep.join(r.to_list()))
+    cached = run(planner.eta_from, planner.render)
+    st = planner.cache.stats()
+    print(f"{queries:,} ETA requests over {hot} station pairs on {n:,} stations, "
+          f"a render every 100 and an edit every {edit_every:,}:")
+    print(f"  uncached {plain:.2f} s, cached {cached:.2f} s ({plain / cached:.1f}x)")
+    print(f"  {st['hits']:,} hits, {st['misses']:,} misses ({st['hit_rate']:.1%}), "
+          f"{st['invalidated']:,} entries invalidated by edits")
+
+
 if __name__ == '__main__':
-    Planner().run()
+    parser = argparse.ArgumentParser(description="Virtual Train Route Planner")
+    parser.add_argument("--bench", type=int, nargs="?", const=1_000_000, metavar="N",
+                        help="time station lookups on routes of N stations and exit")
+    parser.add_argument("--memory-bench", type=int, nargs="?", const=1_000_000, metavar="N",
+                        help="compare node and array route storage for N stations and exit")
+    parser.add_argument("--network-bench", action="store_true",
+                        help="time journey planning on a random multi-line network and exit")
+    parser.add_argument("--sim-bench", type=int, nargs="?", const=200_000, metavar="TRAINS",
+                        help="time the multi-train simulation and arrival lookups and exit")
+    parser.add_argument("--cache-bench", action="store_true",
+                        help="time repeated ETA and route rendering requests with and without the cache and exit")
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(args.bench)
+    elif args.network_bench:
+        network_benchmark()
+    elif args.sim_bench:
+        simulation_benchmark(args.sim_bench)
+    elif args.memory_bench:
+        memory_benchmark(args.memory_bench)
+    elif args.cache_bench:
+        cache_benchmark()
+    else:
+        Planner().run()
 
@@ -1,92 +1,1640 @@
+import argparse
+import csv
+import heapq
+import io
 import json
-from datetime import datetime
+import mmap
+import operator
+import os
+import shutil
+import struct
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import chain, islice
+from operator import itemgetter
 
 
 # Data Structure
 
-transactions = []  # Each item: {"date": str, "type": str, "amount": float, "category": str}
+class TransactionStore:
+    """Columnar transaction storage: one typed array per field.
+
+    Dates are kept as day ordinals, amounts as integer cents and the
+    type/category strings are dictionary-encoded, so a row costs a few
+    bytes instead of a dict. Iterating still yields the classic
+    {"date", "type", "amount", "category"} dicts.
+    """
+
+    def __init__(self):
+        self.days = array("l")            # date.toordinal()
+        self.cents = array("q")           # amount in cents (fixed point)
+        self.type_codes = array("H")
+        self.category_codes = array("L")
+        self.types: list[str] = []
+        self.categories: list[str] = []
+        self._type_ids: dict[str, int] = {}
+        self._category_ids: dict[str, int] = {}
+
+    # --- building ---
+    def append(self, t: dict) -> int:
+        # Every field is converted before any column grows, so a bad row leaves the store untouched.
+        day = parse_date(t["date"])
+        cents = to_cents(t["amount"])
+        if not isinstance(t["type"], str) or not isinstance(t["category"], str):
+            raise TypeError("type and category must be strings")
+        self.days.append(day.toordinal())
+        self.cents.append(cents)
+        self.type_codes.append(self._encode(t["type"], self.types, self._type_ids))
+        self.category_codes.append(self._encode(t["category"], self.categories, self._category_ids))
+        return len(self.days) - 1
+
+    @staticmethod
+    def _encode(value: str, names: list, ids: dict) -> int:
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(names)
+            names.append(value)
+        return code
+
+    # --- row access ---
+    def __len__(self):
+        return len(self.days)
+
+    def __getitem__(self, i: int) -> dict:
+        return {
+            "date": date.fromordinal(self.days[i]).isoformat(),
+            "type": self.types[self.type_codes[i]],
+            "amount": self.cents[i] / 100,
+            "category": self.categories[self.category_codes[i]],
+        }
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    # --- index keys ---
+    def key(self, field: str, i: int):
+        """Sort key of row i for one of SORT_KEYS (ordinal, cents or name)."""
+        if field == "date":
+            return self.days[i]
+        if field == "amount":
+            return self.cents[i]
+        if field == "type":
+            return self.types[self.type_codes[i]]
+        if field == "category":
+            return self.categories[self.category_codes[i]]
+        raise KeyError(field)
+
+
+def is_iso_date(value: str) -> bool:
+    return len(value) == 10 and value[4] == "-" and value[7] == "-"
+
+
+def parse_date(value: str) -> date:
+    # fromisoformat is much faster; strptime still takes the unpadded dates (2024-1-5) older files hold.
+    if is_iso_date(value):
+        return date.fromisoformat(value)
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def canonical(t: dict) -> dict:
+    """t with its date written as YYYY-MM-DD, so partitions, indexes and reports agree on it."""
+    if is_iso_date(t["date"]):
+        return t
+    return {**t, "date": parse_date(t["date"]).isoformat()}
+
+
+def to_cents(amount: float) -> int:
+    return round(float(amount) * 100)
+
+
+# Indexes
+
+NGRAM = 3  # longest gram kept by SearchIndex; longer keywords intersect their 3-grams
+
+
+class SearchIndex:
+    """Inverted index from type/category/date terms to row numbers.
+
+    Every distinct term gets one posting list. Each term is also indexed by
+    all of its 1..NGRAM-grams, so a substring keyword is resolved against
+    the (small) term vocabulary instead of scanning the rows.
+    """
+
+    FIELDS = ("type", "category", "date")
+
+    def __init__(self):
+        self.postings: dict[tuple[str, str], array] = {}
+        self.grams: dict[str, set[tuple[str, str]]] = {}
+        self.rows = 0
+
+    @staticmethod
+    def terms(t: dict):
+        return (("type", t["type"]), ("category", t["category"]), ("date", t["date"]))
+
+    def add(self, row: int, t: dict):
+        for term in self.terms(t):
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = array("L")
+                self._index_grams(term)
+            posting.append(row)
+        self.rows = row + 1
+
+    def _index_grams(self, term: tuple[str, str]):
+        text = term[1].lower()
+        for n in range(1, NGRAM + 1):
+            for i in range(len(text) - n + 1):
+                self.grams.setdefault(text[i:i + n], set()).add(term)
+
+    def rebuild(self, store: TransactionStore):
+        self.__init__()
+        for row, t in enumerate(store):
+            self.add(row, t)
+
+    def matching_terms(self, keyword: str):
+        keyword = keyword.lower()
+        if len(keyword) <= NGRAM:
+            return self.grams.get(keyword, ())
+        candidates = [self.grams.get(keyword[i:i + NGRAM], set())
+                      for i in range(len(keyword) - NGRAM + 1)]
+        return [term for term in set.intersection(*candidates) if keyword in term[1].lower()]
+
+    def lookup(self, keyword: str) -> list[int]:
+        if not keyword:
+            return list(range(self.rows))
+        terms = self.matching_terms(keyword)
+        postings = [self.postings[term] for term in terms]
+        if len(postings) == 1:
+            return list(postings[0])
+        return sorted(set().union(*postings))
+
+    def save(self, path: str):
+        data = {"rows": self.rows,
+                "postings": [[field, text, posting.tolist()] for (field, text), posting in self.postings.items()]}
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def load(self, path: str, rows: int) -> bool:
+        """Load a saved index; False if it is missing or does not cover exactly `rows` rows."""
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        if data.get("rows") != rows:
+            return False
+        self.__init__()
+        for field, text, posting in data["postings"]:
+            term = (field, text)
+            self.postings[term] = array("L", posting)
+            self._index_grams(term)
+        self.rows = rows
+        return True
+
+
+SORT_KEYS = ("date", "amount", "type", "category")
+SORT_BLOCK = 512  # SortedIndex block size; inserts shift at most 2 * SORT_BLOCK entries
+
+
+class SortedIndex:
+    """(key, row) pairs kept in order in a list of bounded blocks.
+
+    A one-level B-tree: `maxes` holds the last pair of every block, so
+    finding a position is a bisect over the blocks and then within one
+    block, and an insert only shifts entries inside that block.
+    """
+
+    def __init__(self):
+        self.blocks: list[list[tuple]] = []
+        self.maxes: list[tuple] = []
+        self.size = 0
+
+    def bulk_load(self, pairs):
+        pairs = sorted(pairs)
+        self.blocks = [pairs[i:i + SORT_BLOCK] for i in range(0, len(pairs), SORT_BLOCK)]
+        self.maxes = [block[-1] for block in self.blocks]
+        self.size = len(pairs)
+
+    def insert(self, key, row: int):
+        pair = (key, row)
+        self.size += 1
+        if not self.blocks:
+            self.blocks.append([pair])
+            self.maxes.append(pair)
+            return
+        i = bisect_left(self.maxes, pair)
+        if i == len(self.maxes):
+            i -= 1
+            self.blocks[i].append(pair)
+            self.maxes[i] = pair
+        else:
+            insort(self.blocks[i], pair)
+        block = self.blocks[i]
+        if len(block) > 2 * SORT_BLOCK:
+            self.blocks[i:i + 1] = [block[:SORT_BLOCK], block[SORT_BLOCK:]]
+            self.maxes[i:i + 1] = [block[SORT_BLOCK - 1], block[-1]]
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for block in self.blocks:
+            for _, row in block:
+                yield row
+
+    def __reversed__(self):
+        for block in reversed(self.blocks):
+            for _, row in reversed(block):
+                yield row
+
+    def rank(self, key, inclusive: bool) -> int:
+        """Number of pairs whose key is < key (<= key when inclusive)."""
+        probe = (key, float("inf")) if inclusive else (key,)
+        i = bisect_left(self.maxes, probe)
+        if i == len(self.blocks):
+            return self.size
+        return sum(len(block) for block in self.blocks[:i]) + bisect_left(self.blocks[i], probe)
+
+    def count(self, lo=None, hi=None, lo_inclusive: bool = True, hi_inclusive: bool = True) -> int:
+        low = 0 if lo is None else self.rank(lo, not lo_inclusive)
+        high = self.size if hi is None else self.rank(hi, hi_inclusive)
+        return max(high - low, 0)
+
+    def range(self, lo=None, hi=None, lo_inclusive: bool = True, hi_inclusive: bool = True):
+        """Yield the rows with lo <(=) key <(=) hi in key order, in O(log N + k)."""
+        if lo is None:
+            i = j = 0
+        else:
+            start = (lo,) if lo_inclusive else (lo, float("inf"))
+            i = bisect_left(self.maxes, start)
+            if i == len(self.blocks):
+                return
+            j = bisect_left(self.blocks[i], start)
+        for block in self.blocks[i:]:
+            for key, row in block[j:]:
+                if hi is not None and (key > hi or (key == hi and not hi_inclusive)):
+                    return
+                yield row
+            j = 0
+
+
+class RollupCube:
+    """Totals per (month, category, type) cell, updated in O(1) per row.
+
+    A cell is [total cents, count, min cents, max cents]. Reports only walk
+    the cells, so their cost depends on the number of months and
+    categories, not on the number of rows.
+    """
+
+    def __init__(self):
+        self.cells: dict[tuple[str, str, str], list[int]] = {}
+        self.rows = 0
+
+    def add(self, t: dict):
+        self.add_cell(t["date"][:7], t["category"], t["type"], to_cents(t["amount"]))
+
+    def add_cell(self, month: str, category: str, t_type: str, cents: int):
+        key = (month, category, t_type)
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [cents, 1, cents, cents]
+        else:
+            cell[0] += cents
+            cell[1] += 1
+            if cents < cell[2]:
+                cell[2] = cents
+            if cents > cell[3]:
+                cell[3] = cents
+        self.rows += 1
+
+    def rebuild(self, rows):
+        self.__init__()
+        for t in rows:
+            self.add(t)
+
+    def save(self, path: str):
+        data = {"rows": self.rows, "cells": [[*key, *cell] for key, cell in self.cells.items()]}
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def load(self, path: str, rows: int) -> bool:
+        """Load a saved cube; False if it is missing or does not cover exactly `rows` rows."""
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        if data.get("rows") != rows:
+            return False
+        self.__init__()
+        self.cells = {(month, category, t_type): cell
+                      for month, category, t_type, *cell in data["cells"]}
+        self.rows = rows
+        return True
+
+    def __eq__(self, other):
+        return isinstance(other, RollupCube) and self.cells == other.cells
+
+
+transactions = TransactionStore()  # rows: {"date": str, "type": str, "amount": float, "category": str}
+search_index = SearchIndex()
+sorted_indexes = {field: SortedIndex() for field in SORT_KEYS}
+cube = RollupCube()
+
+
+def build_sorted_indexes():
+    for field, index in sorted_indexes.items():
+        index.bulk_load((transactions.key(field, i), i) for i in range(len(transactions)))
 
 
 # Save & Load
 
+DATA_DIR = "transactions"              # snapshot: one YYYY-MM.json file per month + manifest.json
+DATA_FILE = "transactions.json"        # pre-partitioning snapshot, migrated on first load
+JOURNAL_FILE = "transactions.journal"  # rows added since the snapshot, one JSON object per line
+JOURNAL_BATCH = 64                     # fsync the journal every N appended rows
+COMPACT_AFTER = 10_000                 # fold the journal into the snapshot past N rows
+STREAM_CHUNK = 1 << 20                 # characters read per step by iter_records()
+INDEX_FILE = "transactions.index.json"  # SearchIndex matching the snapshot
+CUBE_FILE = "transactions.cube.json"    # RollupCube matching the snapshot
+QUARANTINE_FILE = "transactions.rejected.jsonl"  # unreadable rows dropped on load, one JSON object per line
+REWRITE_BATCH = 100_000                # rows per write_partitions() call when rewriting the snapshot
+READ_ERRORS = (KeyError, TypeError, ValueError)  # raised by TransactionStore.append for an unreadable row
+
+# Binary mode maps a read-only BinaryTransactions file instead of loading the partitions.
+BINARY_FILE: str | None = None
+
+# Streaming mode keeps only the journal tail in `transactions`; the snapshot
+# rows are re-read lazily from the partitions by iter_records() for every query.
+STREAMING = False
+
+# Snapshot row count plus per-month stats: {"rows": n, "partitions": {"YYYY-MM": {...}}}
+manifest = {"rows": 0, "partitions": {}}
+MANIFEST_VERSION = 2  # snapshots without it predate row validation and are checked once on load
+
+
+def read_log(path: str) -> list[dict]:
+    """Parse a line-delimited JSON log, truncating it after the last complete entry.
+
+    An entry is complete once its newline is written. A last line that
+    parses but lacks one is torn too: the next append would land on the
+    same line and make it unreadable.
+    """
+    entries = []
+    good = 0
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break  # partial last write
+                good += len(line)
+            size = f.seek(0, os.SEEK_END)
+    except FileNotFoundError:
+        return entries
+    if good < size:
+        with open(path, "r+b") as f:
+            f.truncate(good)
+    return entries
+
+
+class Journal:
+    """Append-only, line-delimited log of the rows added since the last snapshot.
+
+    Each line carries the row number it was written for, so replaying a
+    journal that was already folded into the snapshot (crash between the
+    two steps of a compaction) is harmless.
+    """
+
+    def __init__(self, path: str = JOURNAL_FILE, batch_size: int = JOURNAL_BATCH):
+        self.path = path
+        self.batch_size = batch_size
+        self.pending: list[str] = []
+        self.entries = 0  # rows in the journal, flushed or not
+        self._file = None
+
+    def replay(self, first_row: int) -> list[dict]:
+        """Return the journaled rows numbered >= first_row, dropping a torn tail."""
+        records = []
+        for entry in read_log(self.path):
+            self.entries += 1
+            if entry.pop("row") >= first_row:
+                records.append(entry)
+        return records
+
+    def append(self, row: int, t: dict):
+        self.pending.append(json.dumps({"row": row, **t}) + "\n")
+        self.entries += 1
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def extend(self, entries):
+        """Journal many (row, t) pairs with a single write and fsync."""
+        before = len(self.pending)
+        self.pending.extend(json.dumps({"row": row, **t}) + "\n" for row, t in entries)
+        self.entries += len(self.pending) - before
+        self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a")
+        self._file.write("".join(self.pending))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.pending.clear()
+
+    def reset(self):
+        self.close()
+        self.pending.clear()
+        self.entries = 0
+        open(self.path, "w").close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+journal = Journal()
+
+
+def iter_records(path: str, chunk_size: int = STREAM_CHUNK):
+    """Yield the rows of a JSON array file one at a time, reading it in chunks.
+
+    Memory stays bounded by the chunk size (plus one row), so files larger
+    than RAM can be scanned and consumers start working on the first rows
+    before the rest of the file has been read.
+    """
+    decoder = json.JSONDecoder()
+    try:
+        f = open(path, "r")
+    except FileNotFoundError:
+        return
+    with f:
+        buf = f.read(chunk_size).lstrip()
+        if not buf:
+            return
+        if buf[0] != "[":
+            raise ValueError(f"{path}: expected a JSON array")
+        pos = 1
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                buf, pos = f.read(chunk_size), 0
+                if not buf:
+                    raise ValueError(f"{path}: truncated JSON array")
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                more = f.read(chunk_size)
+                if not more:
+                    raise
+                buf, pos = buf[pos:] + more, 0  # row straddles the chunk boundary
+                continue
+            yield obj
+            pos = end
+
+
+def partition_path(month: str, directory: str | None = None) -> str:
+    return os.path.join(directory or DATA_DIR, f"{month}.json")
+
+
+def iter_partition(month: str, directory: str | None = None, limit: int | None = None):
+    """Yield (row, t) for the snapshot rows of one month numbered below limit (the manifest's count)."""
+    if limit is None:
+        limit = manifest["rows"]
+    for t in iter_records(partition_path(month, directory)):
+        row = t.pop("row")
+        if row < limit:  # newer rows are leftovers of an interrupted compaction
+            yield row, t
+
+
+def partitions(keep=None) -> list[str]:
+    """Months in the snapshot, optionally pruned by keep(month, stats)."""
+    return [month for month, stats in sorted(manifest["partitions"].items())
+            if keep is None or keep(month, stats)]
+
+
+def stream_rows(keep=None):
+    """All rows in row order: the snapshot partitions (streamed when STREAMING) then the in-memory ones.
+
+    `keep(month, stats)` prunes whole partitions using the manifest, so a
+    date- or amount-scoped scan only opens the files it needs. Each
+    partition is in row order, and they are merged as load_data does.
+    """
+    if STREAMING:
+        merged = heapq.merge(*(iter_partition(month) for month in partitions(keep)), key=itemgetter(0))
+        for _, t in merged:
+            yield t
+    yield from transactions
+
+
+def new_rows():
+    """(row, t) for every row added since the snapshot was written."""
+    if STREAMING:
+        return ((manifest["rows"] + i, t) for i, t in enumerate(transactions))
+    return ((i, transactions[i]) for i in range(manifest["rows"], len(transactions)))
+
+
+def write_json_rows(path: str, rows, numbered: bool = True):
+    # Rows are written one per line so no file is ever built in memory.
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write("[")
+        for i, (row, t) in enumerate(rows):
+            f.write(",\n" if i else "\n")
+            f.write(json.dumps({"row": row, **t} if numbered else t))
+        f.write("\n]\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def write_manifest(directory: str | None = None):
+    manifest["version"] = MANIFEST_VERSION
+    path = os.path.join(directory or DATA_DIR, "manifest.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def update_stats(stats: dict, t: dict):
+    cents = to_cents(t["amount"])
+    if not stats:
+        stats.update(rows=0, first=t["date"], last=t["date"], min_cents=cents, max_cents=cents,
+                     max_expense_cents=None)
+    stats["rows"] += 1
+    stats["first"] = min(stats["first"], t["date"])
+    stats["last"] = max(stats["last"], t["date"])
+    stats["min_cents"] = min(stats["min_cents"], cents)
+    stats["max_cents"] = max(stats["max_cents"], cents)
+    if t["type"] == "expense" and (stats["max_expense_cents"] is None or cents > stats["max_expense_cents"]):
+        stats["max_expense_cents"] = cents
+
+
+def write_partitions(rows, directory: str | None = None, commit: bool = True) -> int:
+    """Fold (row, t) pairs into their month partitions, rewriting only those months.
+
+    Partitions are replaced before the manifest, and readers ignore rows
+    numbered past the manifest's count, so an interrupted write is undone
+    by the journal replay on the next load.
+    """
+    fresh: dict[str, list] = {}
+    for row, t in rows:
+        fresh.setdefault(t["date"][:7], []).append((row, t))
+    os.makedirs(directory or DATA_DIR, exist_ok=True)
+    added = 0
+    for month, month_rows in sorted(fresh.items()):
+        old = iter_partition(month, directory) if month in manifest["partitions"] else ()
+        write_json_rows(partition_path(month, directory), chain(old, month_rows))
+        stats = manifest["partitions"].setdefault(month, {})
+        for _, t in month_rows:
+            update_stats(stats, t)
+        added += len(month_rows)
+    manifest["rows"] += added
+    if commit:
+        write_manifest(directory)
+    return added
+
+
+def rewrite_snapshot(rows, **marks):
+    """Replace the snapshot and journal with `rows` (dicts, in order), numbered from 0.
+
+    The new partitions are staged in DATA_DIR.new and its manifest is
+    written last, which commits the rewrite; finish_rewrite() then swaps
+    it in, or does so on the next load if this one is interrupted.
+    `marks` are extra manifest entries.
+    """
+    global manifest
+    staging = DATA_DIR + ".new"
+    shutil.rmtree(staging, ignore_errors=True)
+    manifest = {"rows": 0, "partitions": {}, **marks}
+    numbered = enumerate(rows)
+    while write_partitions(islice(numbered, REWRITE_BATCH), staging, commit=False):
+        pass
+    write_manifest(staging)
+    finish_rewrite()
+
+
+def finish_rewrite():
+    """Swap a committed DATA_DIR.new in for DATA_DIR, or drop an uncommitted one."""
+    staging = DATA_DIR + ".new"
+    if not os.path.isdir(staging):
+        return
+    if not os.path.exists(os.path.join(staging, "manifest.json")):
+        shutil.rmtree(staging)
+        return
+    journal.reset()  # its rows are part of the new snapshot
+    for path in (INDEX_FILE, CUBE_FILE):  # built for the old row numbering
+        if os.path.exists(path):
+            os.remove(path)
+    retired = DATA_DIR + ".old"
+    if os.path.isdir(DATA_DIR):
+        shutil.rmtree(retired, ignore_errors=True)
+        os.replace(DATA_DIR, retired)
+    os.replace(staging, DATA_DIR)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def quarantine(rejected: list[tuple[dict, Exception]]):
+    """Save unreadable rows to QUARANTINE_FILE before they are dropped, and warn about them."""
+    with open(QUARANTINE_FILE, "a") as f:
+        for t, error in rejected:
+            f.write(json.dumps({"error": str(error), "row": t}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    print(f"Warning: skipped {len(rejected)} unreadable transaction(s); they were saved to {QUARANTINE_FILE}.")
+
+
+def readable_rows(rows, rejected: list):
+    """Yield rows in canonical form; (t, error) pairs for the unreadable ones go to `rejected`."""
+    for t in rows:
+        try:
+            fixed = canonical(t)
+            to_cents(fixed["amount"])
+            if not isinstance(fixed["type"], str) or not isinstance(fixed["category"], str):
+                raise TypeError("type and category must be strings")
+        except READ_ERRORS as e:
+            rejected.append((t, e))
+            continue
+        yield fixed
+
+
+def append_readable(rows, rejected: list):
+    """Append rows to `transactions`; (t, error) pairs for the unreadable ones go to `rejected`.
+
+    Yields (row, t, normalised) for each row added, with t in canonical
+    form and normalised telling whether its date had to be rewritten.
+    """
+    for t in rows:
+        try:
+            fixed = canonical(t)
+            row = transactions.append(fixed)
+        except READ_ERRORS as e:
+            rejected.append((t, e))
+            continue
+        yield row, fixed, fixed is not t
+
+
+def read_manifest() -> dict:
+    """Load the partition manifest, migrating a single-file transactions.json first."""
+    global manifest
+    manifest = {"rows": 0, "partitions": {}}
+    finish_rewrite()
+    try:
+        with open(os.path.join(DATA_DIR, "manifest.json"), "r") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        if os.path.exists(DATA_FILE):
+            migrate_legacy()
+    return manifest
+
+
+def migrate_legacy():
+    """Partition transactions.json (and fold in its journal), quarantining unreadable rows.
+
+    The legacy file stays in place: the manifest names it, and load_data
+    renames it to .bak only once the partitions have loaded.
+    """
+    rejected = []
+    legacy_rows = 0
+
+    def rows():
+        nonlocal legacy_rows
+        for t in iter_records(DATA_FILE):
+            legacy_rows += 1
+            yield t
+        yield from journal.replay(legacy_rows)
+
+    rewrite_snapshot(readable_rows(rows(), rejected), migrated_from=DATA_FILE)
+    if rejected:
+        quarantine(rejected)
+
+
+def retire_legacy():
+    """Rename a migrated transactions.json to .bak now that its partitions have loaded."""
+    legacy = manifest.pop("migrated_from", None)
+    if legacy is None:
+        return
+    if os.path.exists(legacy):
+        os.replace(legacy, legacy + ".bak")
+    write_manifest()
+
+
+def validate_snapshot(rows: int):
+    """Check a snapshot written before rows were validated, rewriting it if any row is unreadable.
+
+    Streaming loads do not read the partitions, so this is their one full
+    pass; in-memory loads check every row as they append it anyway.
+    """
+    def clean(t: dict) -> bool:
+        return next(readable_rows((t,), []), None) is t  # readable and already canonical
+
+    if all(map(clean, stream_rows())):
+        write_manifest()  # stamp it so the check is not repeated
+        return
+    # Read against the current manifest: rewrite_snapshot starts a new one before consuming the rows.
+    merged = heapq.merge(*(iter_partition(month, limit=rows) for month in partitions()), key=itemgetter(0))
+    rejected = []
+    rewrite_snapshot(readable_rows(chain((t for _, t in merged), journal.replay(rows)), rejected))
+    if rejected:
+        quarantine(rejected)
+
+
+def compact():
+    """Fold the journal into the month partitions and start an empty journal."""
+    global transactions
+    journal.flush()
+    write_partitions(new_rows())
+    journal.reset()
+    cube.save(CUBE_FILE)
+    if not STREAMING:
+        search_index.save(INDEX_FILE)
+    else:
+        transactions = TransactionStore()
+
+
+def record_transaction(t: dict) -> int:
+    t = canonical(t)
+    row = transactions.append(t)
+    cube.add(t)
+    if STREAMING:
+        row += manifest["rows"]
+    else:
+        search_index.add(row, t)
+        for field, index in sorted_indexes.items():
+            index.insert(transactions.key(field, row), row)
+    journal.append(row, t)
+    if journal.entries >= COMPACT_AFTER:
+        compact()
+    return row
+
+
+def record_transactions(batch, journaled: bool = True) -> int:
+    """Append many rows at once: one journal write, and sorted indexes rebuilt if the batch is large.
+
+    With journaled=False the rows are only in memory until the caller runs compact().
+    """
+    first = len(transactions)
+    base = manifest["rows"] if STREAMING else 0
+    entries = []
+    for t in map(canonical, batch):
+        row = transactions.append(t)
+        cube.add(t)
+        if not STREAMING:
+            search_index.add(row, t)
+        if journaled:
+            entries.append((base + row, t))
+        else:
+            entries.append(None)
+    if not STREAMING:
+        if len(entries) * 4 > len(transactions):
+            build_sorted_indexes()
+        else:
+            for row in range(first, len(transactions)):
+                for field, index in sorted_indexes.items():
+                    index.insert(transactions.key(field, row), row)
+    if journaled:
+        journal.extend(entries)
+        if journal.entries >= COMPACT_AFTER:
+            compact()
+    return len(entries)
+
 
 def save_data():
-    with open("transactions.json", "w") as f:
-        json.dump(transactions, f, indent=4)
+    # Only the unflushed journal tail is written; the snapshot is rewritten by compact().
+    if BINARY_FILE:
+        transactions.close()
+        return
+    journal.flush()
+    journal.close()
 
 def load_data():
     global transactions
+    if BINARY_FILE:
+        transactions = BinaryTransactions(BINARY_FILE)
+        transactions.rollup(cube)
+        return
+    read_manifest()
+    rows = manifest["rows"]
+    transactions = TransactionStore()
+    rejected = []
+    if STREAMING:
+        if rows and manifest.get("version") != MANIFEST_VERSION:
+            validate_snapshot(rows)
+            rows = manifest["rows"]
+        retire_legacy()
+        if not cube.load(CUBE_FILE, rows):
+            cube.rebuild(stream_rows())
+        for _, t, _ in append_readable(journal.replay(rows), rejected):
+            cube.add(t)
+        if rejected:
+            quarantine(rejected)
+            compact()  # rewrites the journal's readable rows into the snapshot
+        return
+    # Each partition is in row order; merging them restores the global order.
+    merged = heapq.merge(*(iter_partition(month) for month in partitions()), key=itemgetter(0))
+    normalised = sum(changed for _, _, changed in append_readable((t for _, t in merged), rejected))
+    retire_legacy()
+    if rejected or normalised:
+        # Row numbers past the first bad row no longer match the snapshot, so renumber it;
+        # legacy unpadded dates are also filed under the wrong month, so rewrite those too.
+        if rejected:
+            quarantine(rejected)
+            rejected.clear()
+        for _ in append_readable(journal.replay(rows), rejected):
+            pass
+        if rejected:
+            quarantine(rejected)
+        rewrite_snapshot(transactions)
+        search_index.rebuild(transactions)
+        cube.rebuild(transactions)
+        build_sorted_indexes()
+        return
+    if not search_index.load(INDEX_FILE, rows):
+        search_index.rebuild(transactions)
+    if not cube.load(CUBE_FILE, rows):
+        cube.rebuild(transactions)
+    for row, t, _ in append_readable(journal.replay(rows), rejected):
+        search_index.add(row, t)
+        cube.add(t)
+    if rejected:
+        quarantine(rejected)
+        compact()
+    build_sorted_indexes()
+    if rows and manifest.get("version") != MANIFEST_VERSION:
+        write_manifest()  # every row was just checked
+
+
+def check_cube() -> bool:
+    """Rebuild the rollup cube from the raw rows and compare it with the maintained one."""
+    fresh = RollupCube()
+    fresh.rebuild(stream_rows())
+    return fresh == cube
+
+
+# Binary Format
+
+BINARY_MAGIC = b"FTB1"
+BINARY_HEADER = struct.Struct("<4sQQ")  # magic, record count, string table offset
+BINARY_RECORD = struct.Struct("<iqHI")  # day ordinal, cents, type code, category code
+
+
+class BinaryTransactions:
+    """Read-only, memory-mapped view of a fixed-width binary transaction file.
+
+    The file is a header, `count` packed BINARY_RECORD rows and a JSON
+    string table for the type and category codes. Queries unpack the
+    mapped buffer in place; per-row dicts are only built for rows that
+    are actually returned.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, table_offset = BINARY_HEADER.unpack_from(self._map, 0)
+        if magic != BINARY_MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not a binary transaction file")
+        start = BINARY_HEADER.size
+        self._records = memoryview(self._map)[start:start + self.count * BINARY_RECORD.size]
+        tables = json.loads(self._map[table_offset:])
+        self.types: list[str] = tables["types"]
+        self.categories: list[str] = tables["categories"]
+
+    def close(self):
+        if hasattr(self, "_records"):
+            self._records.release()
+        self._map.close()
+        self._file.close()
+
+    def records(self):
+        """(day, cents, type code, category code) tuples straight from the mapped buffer."""
+        return BINARY_RECORD.iter_unpack(self._records)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i: int) -> dict:
+        day, cents, t_code, c_code = BINARY_RECORD.unpack_from(self._records, i * BINARY_RECORD.size)
+        return {"date": date.fromordinal(day).isoformat(), "type": self.types[t_code],
+                "amount": cents / 100, "category": self.categories[c_code]}
+
+    def __iter__(self):
+        return (self[i] for i in range(self.count))
+
+    def rollup(self, cube: "RollupCube"):
+        """Aggregate the mapped rows into a rollup cube without building row dicts."""
+        cube.__init__()
+        months: dict[int, str] = {}
+        for day, cents, t_code, c_code in self.records():
+            month = months.get(day)
+            if month is None:
+                month = months[day] = date.fromordinal(day).isoformat()[:7]
+            cube.add_cell(month, self.categories[c_code], self.types[t_code], cents)
+        cube.rows = self.count
+
+
+def write_binary(path: str, rows) -> int:
+    """Write rows (dicts) to a binary transaction file; returns the row count."""
+    types: dict[str, int] = {}
+    categories: dict[str, int] = {}
+    count = 0
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, 0, 0))
+        batch = []
+        for t in rows:
+            t_code = types.setdefault(t["type"], len(types))
+            c_code = categories.setdefault(t["category"], len(categories))
+            batch.append(BINARY_RECORD.pack(parse_date(t["date"]).toordinal(), to_cents(t["amount"]), t_code, c_code))
+            count += 1
+            if len(batch) >= 65536:
+                f.write(b"".join(batch))
+                batch.clear()
+        f.write(b"".join(batch))
+        table_offset = f.tell()
+        f.write(json.dumps({"types": list(types), "categories": list(categories)}).encode())
+        f.seek(0)
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, count, table_offset))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return count
+
+
+def json_to_binary(json_path: str, binary_path: str) -> int:
+    """Convert a JSON array of transactions (e.g. a legacy transactions.json) to the binary format."""
+    return write_binary(binary_path, iter_records(json_path))
+
+
+def binary_to_json(binary_path: str, json_path: str) -> int:
+    """Convert a binary transaction file back to a JSON array of transactions."""
+    data = BinaryTransactions(binary_path)
     try:
-        with open("transactions.json", "r") as f:
-            transactions = json.load(f)
-    except FileNotFoundError:
-        transactions = []
+        write_json_rows(json_path, enumerate(data), numbered=False)
+    finally:
+        data.close()
+    return len(data)
+
+
+# Bulk Import
+
+IMPORT_CHUNK = 8 << 20    # bytes of CSV handed to one parser process
+IMPORT_BATCH = 100_000    # rows appended per record_transactions() call
+IMPORT_SAMPLE = 10_000    # rows read to pick the file's date format
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%m/%d/%Y", "%d.%m.%Y", "%d-%m-%Y")
+COLUMN_ALIASES = {
+    "date": ("date", "transaction date", "posting date", "booking date", "value date"),
+    "type": ("type", "transaction type"),
+    "amount": ("amount", "value", "transaction amount"),
+    "debit": ("debit", "withdrawal", "money out", "paid out"),
+    "credit": ("credit", "deposit", "money in", "paid in"),
+    "category": ("category",),
+    "description": ("description", "memo", "details", "narrative", "payee"),
+}
+
+
+def split_csv(path: str, chunk_bytes: int = IMPORT_CHUNK):
+    """Return (header, [(start, end), ...]) byte ranges that each end on a line break.
+
+    Rows must not contain quoted line breaks, which bank exports do not use.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        ranges = []
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return header.decode("utf-8-sig"), ranges
+
+
+def column_map(header: str) -> dict[str, int]:
+    names = [name.strip().lower() for name in next(csv.reader([header]))]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    if "date" not in columns or not ({"amount", "debit", "credit"} & columns.keys()):
+        raise ValueError("CSV needs a date column and an amount (or debit/credit) column")
+    return columns
+
+
+def detect_date_format(path: str, header: str, sample: int = IMPORT_SAMPLE) -> str:
+    """The one DATE_FORMATS entry that reads every date in the first `sample` rows.
+
+    A file uses one format throughout, so it is decided here rather than
+    per row: 03/04/2024 could be either day-first or month-first, and
+    only the rest of the file can tell. If several formats still fit,
+    the import is refused rather than guessed. Values no format reads,
+    such as a footer or a junk row, are left out; normalize_row rejects
+    those rows when the file is parsed.
+    """
+    column = column_map(header)["date"]
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        f.readline()
+        values = [fields[column].strip() for fields in islice(csv.reader(f), sample) if len(fields) > column]
+    readable = {fmt: {value for value in values if readable_date(value, fmt)} for fmt in DATE_FORMATS}
+    dates = set().union(*readable.values())
+    if not dates:
+        raise ValueError("no dates found in the first rows; pass the date format explicitly")
+    fits = [fmt for fmt in DATE_FORMATS if readable[fmt] == dates]
+    if not fits:
+        raise ValueError("no single known format reads every date; pass the date format explicitly")
+    if len(fits) > 1:
+        raise ValueError(f"dates are ambiguous ({' or '.join(fits)}); pass the date format explicitly")
+    return fits[0]
+
+
+def readable_date(value: str, fmt: str) -> bool:
+    try:
+        datetime.strptime(value, fmt)
+    except ValueError:
+        return False
+    return True
+
+
+def normalize_date(value: str, fmt: str) -> str:
+    try:
+        return datetime.strptime(value.strip(), fmt).strftime("%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"date {value.strip()!r} does not match {fmt}") from None
+
+
+def parse_amount(value: str) -> float:
+    value = value.strip().replace(",", "").replace("$", "").replace(" ", "")
+    if value.startswith("(") and value.endswith(")"):
+        value = "-" + value[1:-1]
+    return float(value) if value else 0.0
+
+
+def normalize_row(fields: list[str], columns: dict[str, int], date_format: str) -> tuple[str, str, float, str]:
+    """Map one CSV row onto (date, type, amount, category)."""
+    get = lambda field: fields[columns[field]] if field in columns else ""
+    t_date = normalize_date(get("date"), date_format)
+    if "amount" in columns:
+        amount = parse_amount(get("amount"))
+    else:
+        amount = parse_amount(get("credit")) - parse_amount(get("debit"))
+    t_type = get("type").strip().lower()
+    if t_type not in ("income", "expense"):
+        t_type = "expense" if amount < 0 else "income"
+    category = get("category").strip() or get("description").strip() or "uncategorized"
+    return t_date, t_type, abs(amount), category
+
+
+def parse_chunk(job):
+    """Process-pool worker: parse and validate one byte range of the CSV."""
+    path, header, date_format, start, end = job
+    columns = column_map(header)
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    rows, errors = [], []
+    for fields in csv.reader(io.StringIO(text)):
+        if not fields:
+            continue
+        try:
+            rows.append(normalize_row(fields, columns, date_format))
+        except (ValueError, IndexError) as e:
+            errors.append(f"{','.join(fields)[:60]}: {e}")
+    return rows, errors
+
+
+def import_csv(path: str, workers: int | None = None, chunk_bytes: int = IMPORT_CHUNK,
+               date_format: str | None = None) -> dict:
+    """Bulk-load a CSV/bank export; returns row counts, per-stage timings and throughput.
+
+    date_format is a strptime format for the date column; by default it
+    is detected from the first rows, and the import fails if that is
+    ambiguous.
+    """
+    timings = {}
+    started = clock = time.perf_counter()
+    header, ranges = split_csv(path, chunk_bytes)
+    column_map(header)  # fail fast on an unusable header
+    if date_format is None:
+        date_format = detect_date_format(path, header)
+    timings["split"] = time.perf_counter() - clock
+
+    imported = rejected = 0
+    errors = []
+    parse_time = append_time = 0.0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        clock = time.perf_counter()
+        for rows, chunk_errors in pool.map(parse_chunk, [(path, header, date_format, a, b) for a, b in ranges]):
+            now = time.perf_counter()
+            parse_time += now - clock
+            rejected += len(chunk_errors)
+            errors.extend(chunk_errors[:5 - len(errors)] if len(errors) < 5 else ())
+            for i in range(0, len(rows), IMPORT_BATCH):
+                imported += record_transactions(
+                    ({"date": d, "type": t, "amount": a, "category": c} for d, t, a, c in rows[i:i + IMPORT_BATCH]),
+                    journaled=False)
+            clock = time.perf_counter()
+            append_time += clock - now
+    timings["parse"] = parse_time  # time spent waiting on the pool, overlapped with appends
+    timings["append"] = append_time
+    # A bulk load is persisted by one snapshot rather than by journaling every row.
+    clock = time.perf_counter()
+    compact()
+    timings["snapshot"] = time.perf_counter() - clock
+    total = time.perf_counter() - started
+    timings["total"] = total
+    return {"imported": imported, "rejected": rejected, "errors": errors, "chunks": len(ranges),
+            "date_format": date_format, "timings": timings, "rows_per_sec": imported / total if total else 0.0}
+
+
+# Query Engine
+
+QUERY_FIELDS = ("date", "amount", "type", "category", "month", "text")  # "text": type, category or date
+QUERY_OPS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+             ">": operator.gt, ">=": operator.ge}
+GROUP_FIELDS = ("month", "date", "type", "category")
+GROUP_ORDER = ("key", "total", "count", "min", "max")
+PLAN_CACHE_SIZE = 256
+
+# Plans evaluate predicates on (day ordinal, cents, type, category) tuples.
+COLUMNS = {"date": 0, "amount": 1, "type": 2, "category": 3}
+
+
+@dataclass(frozen=True)
+class Query:
+    """Immutable query: filter, then group or order, then limit.
+
+    Builder methods return a new Query, so queries are hashable and can be
+    reused; QueryEngine caches the compiled plan for each one.
+    """
+
+    predicates: tuple = ()           # (field, op, value); op is one of QUERY_OPS, "between" or "contains"
+    order_field: str | None = None   # a row field, or one of GROUP_ORDER for grouped queries
+    descending: bool = False
+    group_field: str | None = None
+    max_rows: int | None = None
+
+    def where(self, field: str, op: str, value) -> "Query":
+        if field not in QUERY_FIELDS:
+            raise ValueError(f"unknown field {field!r}")
+        if op not in QUERY_OPS and op not in ("between", "contains"):
+            raise ValueError(f"unknown operator {op!r}")
+        if (field == "text") != (op == "contains") and field not in ("type", "category"):
+            raise ValueError(f"{op!r} is not supported on {field!r}")
+        if op == "between":
+            value = tuple(value)
+        return replace(self, predicates=self.predicates + ((field, op, value),))
+
+    def order_by(self, field: str, descending: bool = False) -> "Query":
+        return replace(self, order_field=field, descending=descending)
+
+    def group_by(self, field: str) -> "Query":
+        if field not in GROUP_FIELDS:
+            raise ValueError(f"cannot group by {field!r}")
+        return replace(self, group_field=field)
+
+    def limit(self, n: int) -> "Query":
+        return replace(self, max_rows=n)
+
+
+@dataclass
+class Plan:
+    source: str   # how rows are fetched, for explain()
+    run: object   # () -> iterable of result dicts
+
+
+@lru_cache(maxsize=1 << 16)
+def iso_date(day: int) -> str:
+    return date.fromordinal(day).isoformat()
+
+
+def month_bounds(month: str) -> tuple[int, int]:
+    first = parse_date(month + "-01")
+    nxt = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+    return first.toordinal(), nxt.toordinal() - 1
+
+
+def column_predicates(query: Query) -> list[tuple[int | str, str, object]]:
+    """Translate predicates into the tuple domain: ordinals, cents, month -> day ranges."""
+    out = []
+    for field, op, value in query.predicates:
+        if field == "text" or op == "contains":
+            out.append((COLUMNS.get(field, "text"), "contains", value.lower()))
+        elif field == "month":
+            if op == "between":
+                out.append((0, "between", (month_bounds(value[0])[0], month_bounds(value[1])[1])))
+            elif op in ("==", "!="):
+                out.append((0, "between" if op == "==" else "outside", month_bounds(value)))
+            else:
+                first, last = month_bounds(value)
+                out.append((0, op, first if op in ("<", ">=") else last))
+        elif field == "date":
+            convert = lambda v: parse_date(v).toordinal()
+            out.append((0, op, tuple(map(convert, value)) if op == "between" else convert(value)))
+        elif field == "amount":
+            out.append((1, op, tuple(map(to_cents, value)) if op == "between" else to_cents(value)))
+        else:
+            out.append((COLUMNS[field], op, value))
+    return out
+
+
+def compile_filter(preds):
+    """Build one tuple -> bool function from translated predicates."""
+    checks = []
+    for col, op, value in preds:
+        if op == "contains":
+            if col == "text":
+                checks.append(lambda r, kw=value: kw in r[2].lower() or kw in r[3].lower() or kw in iso_date(r[0]))
+            else:
+                checks.append(lambda r, c=col, kw=value: kw in r[c].lower())
+        elif op == "between":
+            checks.append(lambda r, c=col, lo=value[0], hi=value[1]: lo <= r[c] <= hi)
+        elif op == "outside":
+            checks.append(lambda r, c=col, lo=value[0], hi=value[1]: not lo <= r[c] <= hi)
+        else:
+            checks.append(lambda r, c=col, f=QUERY_OPS[op], v=value: f(r[c], v))
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda r: all(check(r) for check in checks)
+
+
+def range_bounds(op: str, value):
+    """(lo, hi, lo_inclusive, hi_inclusive) for a range predicate, or None."""
+    if op == "between":
+        return value[0], value[1], True, True
+    if op == "==":
+        return value, value, True, True
+    if op in (">", ">="):
+        return value, None, op == ">=", True
+    if op in ("<", "<="):
+        return None, value, True, op == "<="
+    return None
+
+
+def partition_filter(preds):
+    """keep(month, stats) for the manifest, derived from date and amount predicates."""
+    expense_only = (2, "==", "expense") in preds
+    keeps = []
+    for col, op, value in preds:
+        bounds = range_bounds(op, value) if col in (0, 1) else None
+        if bounds is None:
+            continue
+        lo, hi = bounds[0], bounds[1]
+        if col == 0:
+            lo = None if lo is None else iso_date(lo)
+            hi = None if hi is None else iso_date(hi)
+            keeps.append(lambda stats, lo=lo, hi=hi:
+                         (lo is None or stats["last"] >= lo) and (hi is None or stats["first"] <= hi))
+            continue
+        keeps.append(lambda stats, lo=lo, hi=hi:
+                     (lo is None or stats["max_cents"] >= lo) and (hi is None or stats["min_cents"] <= hi))
+        if expense_only and lo is not None:
+            keeps.append(lambda stats, lo=lo:
+                         stats["max_expense_cents"] is not None and stats["max_expense_cents"] >= lo)
+    return lambda month, stats: all(keep(stats) for keep in keeps)
+
+
+def aggregate(keyed_cents, descending: bool, order_field: str | None):
+    """Fold (group key, cents) pairs into result dicts sorted by key or by an aggregate."""
+    groups: dict = {}
+    for key, cents in keyed_cents:
+        cell = groups.get(key)
+        if cell is None:
+            groups[key] = [cents, 1, cents, cents]
+        else:
+            cell[0] += cents
+            cell[1] += 1
+            cell[2] = min(cell[2], cents)
+            cell[3] = max(cell[3], cents)
+    return group_rows(groups, descending, order_field)
+
+
+def group_rows(groups: dict, descending: bool, order_field: str | None) -> list[dict]:
+    rows = [{"key": key, "total": total / 100, "count": count, "min": low / 100, "max": high / 100}
+            for key, (total, count, low, high) in groups.items()]
+    rows.sort(key=itemgetter(order_field or "key"), reverse=descending)
+    return rows
+
+
+class QueryEngine:
+    """Plans and runs Query objects against whatever storage is loaded.
+
+    The planner pushes predicates down as far as the active mode allows:
+    the rollup cube for month/category/type aggregates, the search and
+    sorted indexes in memory, partition pruning when streaming, and a
+    tuple scan of the mapped buffer for binary files. Compiled plans are
+    cached per (query, mode); which index to read is decided when the
+    plan runs, from the current index sizes.
+    """
+
+    def __init__(self, cache_size: int = PLAN_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._plans: OrderedDict = OrderedDict()
+
+    def run(self, query: Query):
+        return self.plan(query).run()
+
+    def explain(self, query: Query) -> str:
+        return self.plan(query).source
+
+    def plan(self, query: Query) -> Plan:
+        mode = "binary" if BINARY_FILE else "stream" if STREAMING else "memory"
+        key = (query, mode)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._compile(query, mode)
+            self._plans[key] = plan
+            if len(self._plans) > self.cache_size:
+                self._plans.popitem(last=False)
+        else:
+            self._plans.move_to_end(key)
+        return plan
+
+    def _compile(self, query: Query, mode: str) -> Plan:
+        if query.group_field and query.order_field not in (None, *GROUP_ORDER):
+            raise ValueError(f"grouped queries order by one of {GROUP_ORDER}")
+        if not query.group_field and query.order_field not in (None, *SORT_KEYS):
+            raise ValueError(f"cannot order by {query.order_field!r}")
+        if self._cube_answers(query):
+            return self._cube_plan(query)
+        preds = column_predicates(query)
+        keep = compile_filter(preds)
+        if mode == "memory":
+            source, scan = self._memory_scan(query, preds)
+        elif mode == "stream":
+            source, scan = "partition scan", self._stream_scan(preds)
+        else:
+            source, scan = "mapped scan", self._binary_scan
+        wanted = (query.order_field, query.descending) if query.order_field else None
+
+        def run():
+            rows, row_order = scan()
+            if keep is not None:
+                rows = (item for item in rows if keep(item[1]))
+            if query.group_field:
+                result = aggregate(((group_key(query.group_field, r), r[1]) for _, r in rows),
+                                   query.descending, query.order_field)
+                return result[:query.max_rows] if query.max_rows is not None else result
+            if wanted and row_order != wanted:
+                if row_order == (query.order_field, not query.descending):
+                    rows = reversed(list(rows))
+                else:
+                    col = COLUMNS[query.order_field]
+                    rows = sorted(rows, key=lambda item: item[1][col], reverse=query.descending)
+            if query.max_rows is not None:
+                rows = islice(rows, query.max_rows)
+            return (to_row(handle) for handle, _ in rows)
+
+        return Plan(source, run)
+
+    # --- sources: each returns (iterable of (handle, tuple), (field, descending) order or None) ---
+    def _memory_scan(self, query: Query, preds):
+        store_order = None if query.group_field else query.order_field
+        candidates = []
+        for col, op, value in preds:
+            if col in (0, 1) and range_bounds(op, value):
+                candidates.append(("range", col, range_bounds(op, value)))
+            elif col in (2, 3) and op == "==":
+                candidates.append(("term", col, value))
+            elif op == "contains":
+                candidates.append(("text", col, value))
+
+        def estimate(kind, col, arg) -> int:
+            if kind == "range":
+                return sorted_indexes[SORT_KEYS[col]].count(*arg)
+            if kind == "term":
+                return len(search_index.postings.get((SORT_KEYS[col], arg), ()))
+            return sum(len(search_index.postings[term]) for term in search_index.matching_terms(arg))
+
+        def scan():
+            # Read the index with the fewest matching rows; a full scan if none beats it.
+            best, best_size = None, len(transactions)
+            for candidate in candidates:
+                size = estimate(*candidate)
+                if size < best_size:
+                    best, best_size = candidate, size
+            if best is None:
+                if store_order:
+                    index = sorted_indexes[store_order]
+                    ids = reversed(index) if query.descending else index
+                    return ((i, memory_tuple(i)) for i in ids), (store_order, query.descending)
+                return ((i, memory_tuple(i)) for i in range(len(transactions))), None
+            kind, col, arg = best
+            order = None
+            if kind == "range":
+                ids = sorted_indexes[SORT_KEYS[col]].range(*arg)
+                if store_order == SORT_KEYS[col]:
+                    order = (store_order, False)
+                else:
+                    ids = sorted(ids)  # row order, as a plain scan returns them
+            elif kind == "term":
+                ids = search_index.postings.get((SORT_KEYS[col], arg), ())
+            else:
+                ids = search_index.lookup(arg)
+            return ((i, memory_tuple(i)) for i in ids), order
+
+        return ("memory index scan" if candidates else "memory scan"), scan
+
+    def _stream_scan(self, preds):
+        keep = partition_filter(preds)
+
+        def scan():
+            return ((t, dict_tuple(t)) for t in stream_rows(keep)), None
+
+        return scan
+
+    @staticmethod
+    def _binary_scan():
+        types, categories = transactions.types, transactions.categories
+        return ((i, (day, cents, types[t], categories[c]))
+                for i, (day, cents, t, c) in enumerate(transactions.records())), None
+
+    # --- rollup cube ---
+    @staticmethod
+    def _cube_answers(query: Query) -> bool:
+        if query.group_field not in ("month", "type", "category"):
+            return False
+        return all((field in ("type", "category") and op == "==")
+                   or (field == "month" and (op in QUERY_OPS or op == "between"))
+                   for field, op, _ in query.predicates)
+
+    @staticmethod
+    def _cube_plan(query: Query) -> Plan:
+        dim = ("month", "category", "type").index(query.group_field)
+        checks = []
+        for field, op, value in query.predicates:
+            i = ("month", "category", "type").index(field)
+            if op == "between":
+                checks.append(lambda key, i=i, lo=value[0], hi=value[1]: lo <= key[i] <= hi)
+            else:
+                checks.append(lambda key, i=i, f=QUERY_OPS[op], v=value: f(key[i], v))
+
+        def run():
+            groups: dict = {}
+            for key, (total, count, low, high) in cube.cells.items():
+                if all(check(key) for check in checks):
+                    cell = groups.get(key[dim])
+                    if cell is None:
+                        groups[key[dim]] = [total, count, low, high]
+                    else:
+                        cell[0] += total
+                        cell[1] += count
+                        cell[2] = min(cell[2], low)
+                        cell[3] = max(cell[3], high)
+            result = group_rows(groups, query.descending, query.order_field)
+            return result[:query.max_rows] if query.max_rows is not None else result
+
+        return Plan("rollup cube", run)
+
+
+def memory_tuple(i: int) -> tuple:
+    store = transactions
+    return store.days[i], store.cents[i], store.types[store.type_codes[i]], store.categories[store.category_codes[i]]
+
+
+def dict_tuple(t: dict) -> tuple:
+    return parse_date(t["date"]).toordinal(), to_cents(t["amount"]), t["type"], t["category"]
+
+
+def group_key(field: str, r: tuple) -> str:
+    if field == "month":
+        return iso_date(r[0])[:7]
+    if field == "date":
+        return iso_date(r[0])
+    return r[COLUMNS[field]]
+
+
+def to_row(handle) -> dict:
+    # Streaming scans hand back the parsed dict itself; the others a row number.
+    return handle if isinstance(handle, dict) else transactions[handle]
+
+
+engine = QueryEngine()
 
 
 # Core Functions
 
 
 def add_transaction():
+    if BINARY_FILE:
+        print("Binary files are read-only.")
+        return
     t_type = input("Enter type (income/expense): ").lower()
     amount = float(input("Enter amount: "))
     category = input("Enter category: ")
-    date = input("Enter date (YYYY-MM-DD) or leave blank for today: ")
-    if not date:
-        date = datetime.today().strftime("%Y-%m-%d")
-
-    transactions.append({
-        "date": date,
-        "type": t_type,
-        "amount": amount,
-        "category": category
-    })
+    t_date = input("Enter date (YYYY-MM-DD) or leave blank for today: ")
+    if not t_date:
+        t_date = datetime.today().strftime("%Y-%m-%d")
+
+    try:
+        record_transaction({
+            "date": t_date,
+            "type": t_type,
+            "amount": amount,
+            "category": category
+        })
+    except ValueError:
+        print("Invalid date. Use YYYY-MM-DD.")
+        return
     print("Transaction added!")
 
 
 def view_transactions():
-    if not transactions:
+    shown = 0
+    for shown, t in enumerate(engine.run(Query()), 1):
+        print(f"{shown}. {t['date']} | {t['type'].title()} | ${t['amount']} | {t['category']}")
+    if not shown:
         print("No transactions recorded.")
-        return
-    for i, t in enumerate(transactions, 1):
-        print(f"{i}. {t['date']} | {t['type'].title()} | ${t['amount']} | {t['category']}")
 
 
 def sort_transactions():
     key = input("Sort by (date/amount/type/category): ").lower()
-    sorted_data = sorted(transactions, key=lambda x: x[key])
-    for t in sorted_data:
+    if key not in SORT_KEYS:
+        print("Invalid sort key.")
+        return
+    for t in engine.run(Query().order_by(key)):
         print(f"{t['date']} | {t['type'].title()} | ${t['amount']} | {t['category']}")
 
 
+def print_results(results, empty_message: str):
+    found = False
+    for t in results:
+        print(f"{t['date']} | {t['type']} | ${t['amount']} | {t['category']}")
+        found = True
+    if not found:
+        print(empty_message)
+
+
 def search_transactions():
     keyword = input("Enter keyword to search (type/category/date): ").lower()
-    results = [t for t in transactions if keyword in str(t.values()).lower()]
-    if results:
-        for t in results:
-            print(f"{t['date']} | {t['type']} | ${t['amount']} | {t['category']}")
-    else:
-        print("No results found.")
+    print_results(engine.run(Query().where("text", "contains", keyword)), "No results found.")
 
 
 def filter_expenses_over():
     threshold = float(input("Show expenses over amount: "))
-    results = [t for t in transactions if t["type"] == "expense" and t["amount"] > threshold]
-    if results:
-        for t in results:
-            print(f"{t['date']} | {t['type']} | ${t['amount']} | {t['category']}")
-    else:
-        print("No expenses above threshold.")
+    query = Query().where("type", "==", "expense").where("amount", ">", threshold)
+    print_results(engine.run(query), "No expenses above threshold.")
+
+
+def range_transactions():
+    field = input("Range over (date/amount): ").lower()
+    if field not in ("date", "amount"):
+        print("Invalid field.")
+        return
+    lo = input("From (blank for no lower bound): ") or None
+    hi = input("To (blank for no upper bound): ") or None
+    query = Query().order_by(field)
+    try:
+        if lo is not None:
+            query = query.where(field, ">=", float(lo) if field == "amount" else lo)
+        if hi is not None:
+            query = query.where(field, "<=", float(hi) if field == "amount" else hi)
+        results = engine.run(query)
+    except ValueError:
+        print("Invalid bound.")
+        return
+    print_results(results, "No transactions in range.")
 
 # ============================
 # Bonus: ASCII Bar Chart
 # ============================
 
+def monthly_expenses() -> dict[str, float]:
+    query = Query().where("type", "==", "expense").group_by("month")
+    return {row["key"]: row["total"] for row in engine.run(query)}  # YYYY-MM -> total
+
+
 def monthly_spending_chart():
-    monthly = {}
-    for t in transactions:
-        if t["type"] == "expense":
-            month = t["date"][:7]  # YYYY-MM
-            monthly[month] = monthly.get(month, 0) + t["amount"]
+    monthly = monthly_expenses()
 
     if not monthly:
         print("No expenses recorded.")
@@ -98,6 +1646,57 @@ def monthly_spending_chart():
         print(f"{month}: ${total:.2f} | {bars}")
 
 
+
+def bulk_import():
+    if BINARY_FILE:
+        print("Binary files are read-only.")
+        return
+    path = input("CSV file to import: ").strip()
+    date_format = input("Date format, e.g. %m/%d/%Y (blank to detect): ").strip() or None
+    try:
+        report = import_csv(path, date_format=date_format)
+    except (OSError, ValueError) as e:
+        print(f"Import failed: {e}")
+        return
+    print(f"Imported {report['imported']} rows ({report['rejected']} rejected) "
+          f"from {report['chunks']} chunks at {report['rows_per_sec']:,.0f} rows/sec")
+    print(f"  dates read as {report['date_format']}")
+    for stage, seconds in report["timings"].items():
+        print(f"  {stage}: {seconds:.3f}s")
+    for error in report["errors"]:
+        print(f"  rejected: {error}")
+
+
+def category_report():
+    t_type = input("Report on (income/expense): ").lower() or "expense"
+    report = engine.run(Query().where("type", "==", t_type).group_by("category"))
+    if not report:
+        print(f"No {t_type} recorded.")
+        return
+    print(f"\n{t_type.title()} by Category:")
+    for row in report:
+        print(f"{row['key']}: ${row['total']:.2f} over {row['count']} | min ${row['min']:.2f} | max ${row['max']:.2f}")
+
+
+def year_over_year_report():
+    monthly = monthly_expenses()
+    if not monthly:
+        print("No expenses recorded.")
+        return
+    years = sorted({month[:4] for month in monthly})
+    print("\nYear-over-Year Spending:")
+    print("Month | " + " | ".join(years))
+    for mm in range(1, 13):
+        row = [monthly.get(f"{year}-{mm:02d}", 0.0) for year in years]
+        if any(row):
+            print(f"{mm:02d}    | " + " | ".join(f"${v:.2f}" for v in row))
+    totals = [sum(v for m, v in monthly.items() if m.startswith(year)) for year in years]
+    print("Total | " + " | ".join(f"${v:.2f}" for v in totals))
+    for prev, cur, year in zip(totals, totals[1:], years[1:]):
+        if prev:
+            print(f"{year}: {(cur - prev) / prev * 100:+.1f}% vs previous year")
+
+
 # Main Menu
 
 
@@ -111,7 +1710,11 @@ def main():
         print("4. Search Transactions")
         print("5. Filter Expenses Over X")
         print("6. Show Monthly Spending Chart")
-        print("7. Save & Exit")
+        print("7. Range Query (date/amount)")
+        print("8. Category Report")
+        print("9. Year-over-Year Report")
+        print("10. Bulk Import CSV")
+        print("11. Save & Exit")
         choice = input("Choose an option: ")
 
         if choice == "1":
@@ -127,6 +1730,14 @@ def main():
         elif choice == "6":
             monthly_spending_chart()
         elif choice == "7":
+            range_transactions()
+        elif choice == "8":
+            category_report()
+        elif choice == "9":
+            year_over_year_report()
+        elif choice == "10":
+            bulk_import()
+        elif choice == "11":
             save_data()
             print("Data saved. Exiting...")
             break
@@ -134,4 +1745,27 @@ def main():
             print("Invalid choice. Try again.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Personal Finance Tracker")
+    parser.add_argument("--stream", action="store_true",
+                        help="scan the month partitions lazily instead of loading them into memory")
+    parser.add_argument("--binary", metavar="FILE", help="open a binary transaction file read-only (memory-mapped)")
+    parser.add_argument("--check", action="store_true", help="rebuild the report cube from the raw rows and compare")
+    parser.add_argument("--export-binary", metavar="FILE", help="write all transactions to a binary file and exit")
+    parser.add_argument("--json-to-binary", nargs=2, metavar=("JSON", "BIN"), help="convert a JSON array file")
+    parser.add_argument("--binary-to-json", nargs=2, metavar=("BIN", "JSON"), help="convert a binary file")
+    args = parser.parse_args()
+    STREAMING = args.stream
+    BINARY_FILE = args.binary
+
+    if args.json_to_binary:
+        print(f"Converted {json_to_binary(*args.json_to_binary)} transactions.")
+    elif args.binary_to_json:
+        print(f"Converted {binary_to_json(*args.binary_to_json)} transactions.")
+    elif args.export_binary:
+        load_data()
+        print(f"Exported {write_binary(args.export_binary, stream_rows())} transactions.")
+    elif args.check:
+        load_data()
+        print("Report cube consistent." if check_cube() else "Report cube out of date; rebuild with compaction.")
+    else:
+        main()
@@ -0,0 +1,18 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_script(filename: str, name: str):
+    """Import one of the top-level scripts as a fresh module.
+
+    The scripts keep their state in module globals, so each call stands in
+    for a new process: a restart after a crash is just another load.
+    """
+    spec = importlib.util.spec_from_file_location(name, ROOT / filename)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # dataclasses look their module up by name
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import load_script
+
+BANK_EXPORT = """Date,Description,Debit,Credit
+03/04/2024,Coffee,3.50,
+05/04/2024,Salary,,2000.00
+13/04/2024,Rent,"1,200.00",
+not a date,junk,1,
+,,,
+Total,,1203.50,2000.00
+"""
+
+
+@pytest.fixture
+def ft(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    module = load_script("finance_tracker.py", "finance_tracker")
+    module.load_data()
+    return module
+
+
+def write_csv(tmp_path, text: str) -> str:
+    path = tmp_path / "export.csv"
+    path.write_text(text)
+    return str(path)
+
+
+def test_bank_export_with_debit_credit_columns_and_junk_rows(ft, tmp_path):
+    report = ft.import_csv(write_csv(tmp_path, BANK_EXPORT), workers=1)
+
+    # 13/04 settles 03/04 and 05/04 as day-first; the junk, blank and footer rows are rejected one by one
+    assert report["date_format"] == "%d/%m/%Y"
+    assert (report["imported"], report["rejected"]) == (3, 3)
+    assert list(ft.transactions) == [
+        {"date": "2024-04-03", "type": "expense", "amount": 3.5, "category": "Coffee"},
+        {"date": "2024-04-05", "type": "income", "amount": 2000.0, "category": "Salary"},
+        {"date": "2024-04-13", "type": "expense", "amount": 1200.0, "category": "Rent"},
+    ]
+
+    ft = load_script("finance_tracker.py", "finance_tracker")
+    ft.load_data()
+    assert len(ft.transactions) == 3
+
+
+def test_ambiguous_dates_are_refused_unless_the_format_is_given(ft, tmp_path):
+    path = write_csv(tmp_path, "Date,Amount,Category\n03/04/2024,-5,food\n05/04/2024,10,pay\nTotal,5,\n")
+    with pytest.raises(ValueError, match="ambiguous"):
+        ft.import_csv(path, workers=1)
+    assert len(ft.transactions) == 0
+
+    report = ft.import_csv(path, workers=1, date_format="%m/%d/%Y")
+    assert (report["imported"], report["rejected"]) == (2, 1)
+    assert [(t["date"], t["type"], t["amount"]) for t in ft.transactions] == [
+        ("2024-03-04", "expense", 5.0), ("2024-05-04", "income", 10.0)]
+
+
+def test_dates_in_two_formats_are_refused(ft, tmp_path):
+    path = write_csv(tmp_path, "Date,Amount\n2024-04-03,1\n13/04/2024,2\n")
+    with pytest.raises(ValueError, match="no single known format"):
+        ft.import_csv(path, workers=1)
+
+
+def test_a_file_without_dates_is_refused(ft, tmp_path):
+    path = write_csv(tmp_path, "Date,Amount\nTotal,1\n,2\n")
+    with pytest.raises(ValueError, match="no dates"):
+        ft.import_csv(path, workers=1)
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from conftest import load_script
+
+
+def row(i: int) -> dict:
+    return {"date": f"2024-01-{i % 28 + 1:02d}", "type": "expense", "amount": i, "category": "food"}
+
+
+@pytest.fixture
+def restart(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def restart():
+        ft = load_script("finance_tracker.py", "finance_tracker")
+        ft.load_data()
+        return ft
+
+    return restart
+
+
+def amounts(ft) -> list:
+    return [t["amount"] for t in ft.transactions]
+
+
+def record(ft, rows):
+    for t in rows:
+        ft.record_transaction(t)
+    ft.save_data()
+
+
+@pytest.mark.parametrize("cut", [1, 10])
+def test_torn_last_entry_is_dropped_and_truncated(restart, cut):
+    ft = restart()
+    record(ft, map(row, range(5)))
+    with open(ft.JOURNAL_FILE, "rb") as f:
+        data = f.read()
+    with open(ft.JOURNAL_FILE, "wb") as f:
+        f.write(data[:-cut])  # cut=1 leaves valid JSON without its newline
+
+    ft = restart()
+    assert amounts(ft) == [0, 1, 2, 3]
+    assert os.path.getsize(ft.JOURNAL_FILE) == data.rindex(b"\n", 0, len(data) - 1) + 1
+
+    record(ft, [row(7)])
+    ft = restart()
+    assert amounts(ft) == [0, 1, 2, 3, 7]
+
+
+def test_appends_after_a_torn_tail_survive_another_restart(restart):
+    ft = restart()
+    record(ft, map(row, range(3)))
+    with open(ft.JOURNAL_FILE, "a") as f:
+        f.write('{"row": 3, "date": "2024-01-04", "type": "exp')
+
+    ft = restart()
+    record(ft, map(row, range(10, 12)))
+    ft = restart()
+    assert amounts(ft) == [0, 1, 2, 10, 11]
+
+
+def test_journal_already_folded_into_the_snapshot_is_not_replayed(restart):
+    ft = restart()
+    record(ft, map(row, range(4)))
+    with open(ft.JOURNAL_FILE, "rb") as f:
+        journal = f.read()
+    ft.compact()
+    ft.save_data()
+    with open(ft.JOURNAL_FILE, "wb") as f:  # crash before the journal was reset
+        f.write(journal)
+
+    ft = restart()
+    assert amounts(ft) == [0, 1, 2, 3]
+    record(ft, [row(9)])
+    ft = restart()
+    assert amounts(ft) == [0, 1, 2, 3, 9]
+
+
+def test_streaming_mode_replays_the_same_rows(restart):
+    ft = restart()
+    record(ft, map(row, range(3)))
+    ft.compact()
+    record(ft, map(row, range(3, 6)))
+    with open(ft.JOURNAL_FILE, "rb+") as f:
+        f.truncate(os.path.getsize(ft.JOURNAL_FILE) - 1)
+
+    ft = load_script("finance_tracker.py", "finance_tracker")
+    ft.STREAMING = True
+    ft.load_data()
+    assert [t["amount"] for t in ft.stream_rows()] == [0, 1, 2, 3, 4]
@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+import pytest
+
+from conftest import load_script
+
+hq = load_script("Hospital_patient_Queue.py", "hospital_patient_queue")
+
+
+async def exchange(address: str, lines: list[bytes]) -> list:
+    """Start a shard, pipeline the request lines on one connection and return the parsed replies."""
+    ready = asyncio.Event()
+    server = asyncio.create_task(hq.serve_shard(address, ready))
+    await asyncio.wait_for(ready.wait(), 5)
+    try:
+        reader, writer = await asyncio.open_unix_connection(address)
+        writer.write(b"".join(lines))
+        await writer.drain()
+        replies = [json.loads(await asyncio.wait_for(reader.readline(), 5)) for _ in lines]
+        writer.close()
+        return replies
+    finally:
+        server.cancel()
+
+
+def is_error(reply) -> bool:
+    return isinstance(reply, dict) and set(reply) == {"error"}
+
+
+def test_malformed_commands_fail_alone(tmp_path):
+    batch = [["add", "er", "ann", 2], ["wait", "er"], ["cancel", "er"], ["bogus", "er"], "junk", ["add"],
+             ["add", "er", "bob", 9], [], ["add", ["er"], "cy"], ["wait", "er", "ann"], ["next", "er"]]
+    lines = [json.dumps(batch).encode() + b"\n", b"5\n", b'{"op": "add"}\n', b"not json\n",
+             json.dumps([["next", "er"], ["next", "icu"]]).encode() + b"\n"]
+    replies = asyncio.run(exchange(str(tmp_path / "shard.sock"), lines))
+
+    first = replies[0]
+    assert len(first) == len(batch)
+    assert isinstance(first[0], int)
+    assert all(is_error(r) for r in first[1:9])
+    assert first[9] == 0
+    assert first[10] == [first[0], "ann", 2]
+    assert all(is_error(r) for r in replies[1:4])
+    assert replies[4] == [None, None]
+
+
+@pytest.mark.parametrize("command", [["bogus", "icu"], ["next", "icu"], ["wait", "icu", "ann"],
+                                     ["cancel", "icu", 1], ["add", "icu", "ann", 9], ["add", "icu"]])
+def test_failed_or_read_only_commands_leave_no_queue_behind(command):
+    queues = {}
+    try:
+        hq.apply_command(queues, command)
+    except (ValueError, TypeError):
+        pass
+    assert queues == {}
@@ -0,0 +1,102 @@
+import os
+import random
+
+import pytest
+
+from conftest import load_script
+
+hq = load_script("Hospital_patient_Queue.py", "hospital_patient_queue")
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "queue.wal"), str(tmp_path / "queue.snapshot.json")
+
+
+def recover(paths, snapshot_every=None) -> hq.PatientQueue:
+    return hq.WriteAheadLog(*paths, snapshot_every=snapshot_every).recover()
+
+
+def state(queue: hq.PatientQueue) -> list:
+    """Waiting patients in treatment order."""
+    return [(p.pid, p.name, p.severity) for p in queue.emergency() + queue.regular()]
+
+
+def shutdown(queue: hq.PatientQueue):
+    queue.commit()
+    queue.wal.close()
+
+
+def names(queue: hq.PatientQueue) -> list[str]:
+    return [name for _, name, _ in state(queue)]
+
+
+@pytest.mark.parametrize("cut", [1, 7])
+def test_torn_last_record_is_dropped_and_truncated(paths, cut):
+    queue = recover(paths)
+    for name, severity in [("ann", 2), ("bob", None), ("cy", 1)]:
+        queue.add(name, severity)
+    shutdown(queue)
+    with open(paths[0], "rb") as f:
+        data = f.read()
+    with open(paths[0], "wb") as f:
+        f.write(data[:-cut])  # cut=1 leaves valid JSON without its newline
+
+    queue = recover(paths)
+    assert names(queue) == ["ann", "bob"]
+    assert os.path.getsize(paths[0]) == data.rindex(b"\n", 0, len(data) - 1) + 1
+
+    queue.add("dee", 3)
+    shutdown(queue)
+    assert names(recover(paths)) == ["ann", "dee", "bob"]
+
+
+def test_records_covered_by_the_snapshot_are_skipped(paths):
+    queue = recover(paths)
+    queue.add("ann", None)
+    queue.add("bob", 4)
+    queue.commit()
+    with open(paths[0], "rb") as f:
+        log = f.read()
+    queue.wal.snapshot(queue)
+    queue.wal.close()
+    with open(paths[0], "wb") as f:  # crash before the log was truncated
+        f.write(log)
+
+    queue = recover(paths)
+    assert names(queue) == ["bob", "ann"]
+    queue.pop()
+    shutdown(queue)
+    assert names(recover(paths)) == ["ann"]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_recovery_after_any_torn_write_matches_the_acknowledged_state(paths, seed):
+    rng = random.Random(seed)
+    queue = recover(paths, snapshot_every=40)
+    history = [(0, state(queue))]  # (log size, queue state) after each commit since the last snapshot
+    for _ in range(300):
+        r = rng.random()
+        if r < 0.5 or not len(queue):
+            queue.add(f"p{rng.randrange(30)}", rng.choice([None, 1, 2, 3, 4, 5]))
+        elif r < 0.75:
+            queue.pop()
+        elif r < 0.9:
+            queue.cancel(rng.choice(list(queue.by_id.values())))
+        else:
+            queue.set_severity(rng.choice(list(queue.by_id.values())), rng.choice([None, 1, 2, 3, 4, 5]))
+        queue.commit()
+        size = os.path.getsize(paths[0])
+        if size == 0:  # the commit took a snapshot
+            history = []
+        history.append((size, state(queue)))
+    queue.wal.close()
+
+    with open(paths[0], "rb") as f:
+        data = f.read()
+    for cut in sorted({rng.randrange(len(data) + 1) for _ in range(20)} | {len(data) - 1, len(data)}):
+        with open(paths[0], "wb") as f:
+            f.write(data[:cut])
+        expected = [st for size, st in history if size <= cut][-1]
+        assert state(recover(paths, snapshot_every=40)) == expected
+        assert os.path.getsize(paths[0]) == max(size for size, _ in history if size <= cut)
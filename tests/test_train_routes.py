@@ -0,0 +1,127 @@
+import random
+
+import pytest
+
+from conftest import load_script
+
+train = load_script("Virtual Train_Route_Planner.py", "train_route_planner")
+
+
+class ListRoute:
+    """Plain list model of a route: [node, minutes from the previous station] in route order."""
+
+    def __init__(self, circular: bool):
+        self.circular = circular
+        self.stops: list[list] = []
+
+    def index(self, node) -> int:
+        return next(i for i, (n, _) in enumerate(self.stops) if n is node)
+
+    def first(self, name: str) -> int:
+        """Index of the first stop with this name."""
+        return next(i for i, (n, _) in enumerate(self.stops) if n.name == name)
+
+    def remove(self, node):
+        i = self.index(node)
+        if len(self.stops) > 1 and (self.circular or i + 1 < len(self.stops)):
+            self.stops[(i + 1) % len(self.stops)][1] += self.stops[i][1]
+        del self.stops[i]
+
+    def forward(self, a: int, b: int) -> int:
+        n = len(self.stops)
+        return sum(self.stops[k % n][1] for k in range(a + 1, b + 1 if b >= a else b + n + 1))
+
+    def travel(self, a: int, b: int) -> int:
+        if not self.circular:
+            return self.forward(min(a, b), max(a, b))
+        forward = self.forward(a, b)
+        return min(forward, sum(m for _, m in self.stops) - forward) if a != b else 0
+
+    def stops_between(self, a: int, b: int) -> int:
+        if not self.circular:
+            return abs(a - b)
+        forward = (b - a) % len(self.stops)
+        return min(forward, len(self.stops) - forward)
+
+    def advance(self, a: int, k: int) -> int:
+        if self.circular:
+            return (a + k) % len(self.stops)
+        return min(max(a + k, 0), len(self.stops) - 1)
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(train, "ROUTE_BLOCK", 4)  # splits and dropped blocks after a few edits
+
+
+@pytest.mark.parametrize("circular", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_positions_and_etas_match_a_list_model(circular, seed):
+    rng = random.Random(seed)
+    route = (train.CircularRoute if circular else train.DoublyLinkedRoute)("Line")
+    model = ListRoute(circular)
+    planner = train.Planner()
+    name = lambda: f"s{rng.randrange(40)}"  # repeats: find and the edits act on the stop nearest the start
+    lookup = lambda n: rng.choice([n, n.upper()])
+    for _ in range(400):
+        r = rng.random()
+        if r < 0.3 or not model.stops:
+            minutes = rng.randint(1, 9)
+            model.stops.append([route.append(name(), minutes), minutes])
+        elif r < 0.55:
+            i = model.first(rng.choice(model.stops)[0].name)
+            minutes, new = rng.randint(1, 9), name()
+            assert route.insert_after(lookup(model.stops[i][0].name), new, minutes)
+            model.stops.insert(i + 1, [route[i + 1], minutes])
+            assert route[i + 1].name == new
+        elif r < 0.75 and len(model.stops) > 1:
+            i = model.first(rng.choice(model.stops)[0].name)
+            node = model.stops[i][0]
+            current = route.current
+            assert route.remove(lookup(node.name))
+            if current is node:
+                if circular or i + 1 < len(model.stops):
+                    current = model.stops[(i + 1) % len(model.stops)][0]
+                else:
+                    current = model.stops[i - 1][0]
+            model.remove(node)
+            assert route.current is current
+        elif r < 0.85:
+            k = rng.randint(-12, 12)
+            expected = model.stops[model.advance(model.index(route.current), k)][0]
+            assert route.advance(k) == expected.name and route.current is expected
+        else:
+            station = rng.choice(model.stops)[0].name
+            assert route.set_current(lookup(station))
+            assert route.current is model.stops[model.first(station)][0]
+
+        assert len(route) == len(model.stops)
+        assert route.to_list() == [n.name for n, _ in model.stops]
+        station = name()
+        assert route.find(lookup(station)) is next((n for n, _ in model.stops if n.name == station), None)
+        for _ in range(5):
+            i, j = rng.randrange(len(model.stops)), rng.randrange(len(model.stops))
+            a, b = model.stops[i][0], model.stops[j][0]
+            assert route.position(a) == i and route[i] is a and route[i - len(model.stops)] is a
+            assert route.minutes_between(a, b) == model.forward(i, j)
+            assert route.travel_minutes(a, b) == model.travel(i, j)
+            assert route.stops_between(a, b) == model.stops_between(i, j)
+            here, there = model.index(route.current), model.first(b.name)
+            assert planner.eta_from(route, b.name) == model.travel(here, there)
+            assert planner.stops_to(route, b.name) == model.stops_between(here, there)
+        start = rng.randrange(len(model.stops) + 1)
+        assert route[start:start + 5] == [n for n, _ in model.stops[start:start + 5]]
+
+
+@pytest.mark.parametrize("circular", [False, True])
+def test_array_route_finds_the_repeated_station_nearest_the_head(circular):
+    route = train.ArrayRoute("Line", circular)
+    for station in ["A", "B", "A"]:
+        route.append(station)
+    assert route.find("a") == route.head
+    route.remove("A")
+    route.insert_after("B", "A")  # reuses the freed slot, now ahead of the other A
+    assert route.to_list() == ["B", "A", "A"]
+    assert route.find("A") == route.next[route.head]
+    route.remove("a")
+    assert route.find("A") == route.tail and route.to_list() == ["B", "A"]
@@ -0,0 +1,15 @@
+from conftest import load_script
+
+train = load_script("Virtual Train_Route_Planner.py", "train_route_planner")
+
+
+def test_arrivals_at_every_stop_of_a_repeated_station():
+    loop = train.CircularRoute("Loop")
+    for name, minutes in [("Hub", 2), ("A", 10), ("B", 10), ("hub", 10), ("C", 10)]:
+        loop.append(name, minutes)
+    sim = train.Simulation(tick_minutes=1, dwell=0)
+    sim.add_train(loop, "B")  # heads for the second Hub stop
+    sim.add_train(loop, "C")  # heads round to the first one
+    sim.tick()
+    assert sim.upcoming("HUB") == [(2.0, 1, "Loop"), (10.0, 0, "Loop")]
+    assert sim.next_arrival("hub") == (2.0, 1, "Loop")